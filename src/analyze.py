@@ -0,0 +1,100 @@
+"""
+Long analysis of one position that survives restarts.
+
+    PYTHONPATH=src python -m analyze --moves hhigih --time 60
+    PYTHONPATH=src python -m analyze --moves hhigih --time 60 --parallel root
+
+- Moves as in the tournament log: column then row letters, black first.
+- The search resumes from --snapshot when the file holds this position
+  (or one up to two moves above it), and the tree is written back there
+  afterwards, so runs add up. Root parallel workers all start from the
+  snapshot; the move is decided on the visits of this run only (the
+  snapshot's are not counted once per worker), and their trees are not
+  written back.
+- Prints the search stats, the most visited root moves and the main line.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+
+from constants import BLACK
+from game.gamestate import GameState, opponent
+from src.game.agent import Agent
+from src.game.tree_snapshot import load_snapshot
+from src.parallel.mode import ParallelMode
+
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def parse_moves(text: str) -> list[tuple[int, int]]:
+    if len(text) % 2:
+        raise ValueError(f"moves need two letters each: {text!r}")
+    return [
+        (_LETTERS.index(text[i]), _LETTERS.index(text[i + 1]))
+        for i in range(0, len(text), 2)
+    ]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resumable position analysis")
+    parser.add_argument("--moves", type=str, default="", help='e.g. "hhig"')
+    parser.add_argument("--time", type=float, default=30.0, help="seconds")
+    parser.add_argument("--iterations", type=int, default=10**9)
+    parser.add_argument(
+        "--snapshot", type=str, default="./data/analysis.tree", metavar="PATH"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=ParallelMode,
+        choices=[ParallelMode.NONE, ParallelMode.ROOT],
+        default=ParallelMode.NONE,
+    )
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    state = GameState(current_player=BLACK)
+    try:
+        for move in parse_moves(args.moves):
+            state.apply_move(move)
+            state.current_player = opponent(state.current_player)
+    except ValueError as e:
+        sys.exit(f"analyze: {e}")
+    if state.is_terminal:
+        sys.exit("analyze: the game is over")
+
+    agent = Agent(
+        state.current_player,
+        args.time,
+        args.iterations,
+        args.parallel,
+        args.workers,
+        threat_budget=0,
+        snapshot=args.snapshot,
+        early_stop=False,  # use all of the time given
+    )
+    try:
+        move = agent.select_move(state)
+        if agent.last_stats is not None:
+            print(agent.last_stats.summary())
+        print(f"best move: {move}")
+        if args.parallel == ParallelMode.NONE:
+            n_nodes = agent.save_snapshot(args.snapshot)
+            print(f"snapshot: {args.snapshot} ({n_nodes} nodes)")
+    finally:
+        agent.close()
+
+    saved = load_snapshot(args.snapshot)
+    if saved is not None and args.parallel == ParallelMode.NONE:
+        top = sorted(saved.root_visits().items(), key=lambda kv: -kv[1])[:5]
+        print(f"root visits: {top}")
+        print(f"main line: {saved.principal_variation()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Headless search benchmark, reproducible and comparable across commits.
+
+    PYTHONPATH=src python -m bench [--modes none tree] [--workers 1 4]
+    PYTHONPATH=src python -m bench --compare data/bench_a.json data/bench_b.json
+
+- Fixed positions (opening, midgame, a must-block and a forced win), each
+  searched by a fresh Agent per parallel mode and worker count.
+- Per run: the Agent's SearchStats (iterations, nodes, heuristic calls and
+  their rates per second, phase times, depth), the chosen move and whether
+  it is one of the expected moves. Needs settings.SEARCH_STATS.
+- Moves found by the threat solver before searching have decided_by set;
+  --threat-budget 0 makes every position go through the search.
+- Positions with expected moves are also searched on a ladder of shorter
+  budgets; time_to_correct is the smallest budget that found one.
+- Results go to one JSON file with the commit and settings they ran with.
+  Python's and NumPy's RNGs are seeded before each run (worker processes
+  and thread timing are not deterministic).
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+
+import numpy as np
+
+import settings
+from constants import PLAYER_1
+from game.gamestate import GameState, opponent
+from src.game.agent import Agent
+from src.parallel.mode import ParallelMode
+
+# name -> (moves from the empty board, black first; expected moves or None)
+POSITIONS: dict[str, tuple[list[tuple[int, int]], set[tuple[int, int]] | None]] = {
+    "opening": ([], None),
+    "midgame": (
+        [
+            (7, 7), (8, 8), (8, 6), (6, 8), (6, 6),
+            (9, 7), (7, 5), (7, 9), (10, 8), (5, 7),
+        ],
+        None,
+    ),
+    # black has a four blocked on the left; white must take (9, 7)
+    "must_block": (
+        [(5, 7), (4, 7), (6, 7), (10, 10), (7, 7), (3, 3), (8, 7)],
+        {(9, 7)},
+    ),
+    # black's open three becomes an open four that white cannot stop
+    "forced_win": (
+        [(6, 5), (0, 0), (7, 5), (14, 0), (8, 5), (0, 14)],
+        {(5, 5), (9, 5)},
+    ),
+}
+
+LADDER = (0.05, 0.1, 0.25, 0.5, 1.0)  # fractions of the time limit
+DEFAULT_SEED = 2024
+
+
+def build_position(moves: list[tuple[int, int]]) -> GameState:
+    state = GameState(current_player=PLAYER_1)
+    for move in moves:
+        state.apply_move(move)
+        state.current_player = opponent(state.current_player)
+    return state
+
+
+def run_once(
+    position: str,
+    mode: ParallelMode,
+    n_workers: int,
+    time_limit: float,
+    n_iteration: int,
+    seed: int,
+    threat_budget: int,
+) -> dict:
+    """One select_move by a fresh Agent (stats time the search, not the pool start)"""
+    moves, expected = POSITIONS[position]
+    state = build_position(moves)
+
+    agent = Agent(
+        state.current_player,
+        time_limit,
+        n_iteration,
+        mode,
+        n_workers,
+        threat_budget=threat_budget,
+    )
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        move = agent.select_move(state)
+    finally:
+        agent.close()
+    stats = agent.last_stats
+    if stats is None:
+        raise SystemExit("bench needs settings.SEARCH_STATS = True")
+
+    move = (int(move[0]), int(move[1]))
+    elapsed = max(stats.elapsed, 1e-9)
+    return {
+        "move": list(move),
+        "correct": None if expected is None else move in expected,
+        "decided_by": stats.decided_by,
+        "stop_reason": stats.stop_reason,
+        "elapsed": elapsed,
+        "iterations": stats.iterations,
+        "nodes_created": stats.nodes_created,
+        "heuristic_evals": stats.heuristic_evals,
+        "batch_scores": stats.batch_scores,
+        "eval_hits": stats.eval_hits,
+        "eval_misses": stats.eval_misses,
+        "eval_evictions": stats.eval_evictions,
+        "eval_hit_rate": stats.eval_hit_rate,
+        "max_depth": stats.max_depth,
+        "phase_time": stats.phase_time,
+        "top_moves": [[list(m), n] for m, n in stats.top_moves(5)],
+        "iter_per_s": stats.iterations / elapsed,
+        "nodes_per_s": stats.nodes_created / elapsed,
+        "heuristic_evals_per_s": stats.heuristic_evals / elapsed,
+        "batch_scores_per_s": stats.batch_scores / elapsed,
+    }
+
+
+def run_benchmark(args: argparse.Namespace) -> list[dict]:
+    results = []
+    for mode in args.modes:
+        worker_counts = [1] if mode == ParallelMode.NONE else args.workers
+        for n_workers in worker_counts:
+            for position in args.positions:
+                record = {
+                    "position": position,
+                    "mode": mode.value,
+                    "workers": n_workers,
+                    "time_limit": args.time_limit,
+                    **run_once(
+                        position,
+                        mode,
+                        n_workers,
+                        args.time_limit,
+                        args.iterations,
+                        args.seed,
+                        args.threat_budget,
+                    ),
+                }
+                if POSITIONS[position][1] is not None and not args.no_ladder:
+                    record["ladder"] = []
+                    record["time_to_correct"] = None
+                    for fraction in LADDER:
+                        budget = fraction * args.time_limit
+                        step = run_once(
+                            position,
+                            mode,
+                            n_workers,
+                            budget,
+                            args.iterations,
+                            args.seed,
+                            args.threat_budget,
+                        )
+                        record["ladder"].append(
+                            {
+                                "budget": budget,
+                                "move": step["move"],
+                                "correct": step["correct"],
+                            }
+                        )
+                        if step["correct"] and record["time_to_correct"] is None:
+                            record["time_to_correct"] = budget
+                print(_format_record(record), flush=True)
+                results.append(record)
+    return results
+
+
+def metadata(args: argparse.Namespace) -> dict:
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "seed": args.seed,
+        "threat_budget": args.threat_budget,
+        "settings": {
+            name: getattr(settings, name)
+            for name in (
+                "N_ITERATION",
+                "N_ROLLOUT",
+                "MAX_DEPTH",
+                "ROLLOUT_SAMPLE_SIZE",
+                "ROLLOUT_POLICY",
+                "ROLLOUT_BATCH_LEAVES",
+                "TT_CAPACITY",
+                "EVAL_CACHE_CAPACITY",
+                "TREE_STORAGE",
+            )
+        },
+    }
+
+
+def compare(base_path: str, new_path: str) -> None:
+    """Print rates of new relative to base for the runs both files have"""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    def key(r: dict) -> tuple:
+        return r["position"], r["mode"], r["workers"]
+
+    base_runs = {key(r): r for r in base["results"]}
+    print(f"base {base['meta']['commit']}  new {new['meta']['commit']}")
+    print(f"{'position':<12}{'mode':<6}{'w':>3}{'iter/s':>18}{'evals/s':>22}  ttc")
+    for r in new["results"]:
+        b = base_runs.get(key(r))
+        if b is None:
+            continue
+        print(
+            f"{r['position']:<12}{r['mode']:<6}{r['workers']:>3}"
+            f"{_ratio(b['iter_per_s'], r['iter_per_s']):>18}"
+            f"{_ratio(b['heuristic_evals_per_s'], r['heuristic_evals_per_s']):>22}"
+            f"  {b.get('time_to_correct')} -> {r.get('time_to_correct')}"
+        )
+
+
+# ------------------------------------------------------------------ #
+#                             helpers
+# ------------------------------------------------------------------ #
+
+
+def _git(*cmd: str) -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", *cmd], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _ratio(base: float, new: float) -> str:
+    change = f"x{new / base:.2f}" if base else "-"
+    return f"{base:.0f}->{new:.0f} {change}"
+
+
+def _format_record(r: dict) -> str:
+    line = (
+        f"{r['position']:<12}{r['mode']:<6}w={r['workers']:<3}"
+        f"iter/s={r['iter_per_s']:<8.1f}nodes/s={r['nodes_per_s']:<8.1f}"
+        f"evals/s={r['heuristic_evals_per_s']:<10.0f}move={tuple(r['move'])}"
+    )
+    if r["correct"] is not None:
+        line += f" correct={r['correct']} ttc={r.get('time_to_correct')}"
+    if r["decided_by"] != "search":
+        line += f" by={r['decided_by']}"
+    else:
+        line += f" stop={r['stop_reason']}"
+    return line
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Search benchmark")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        type=ParallelMode,
+        default=list(ParallelMode),
+        metavar="MODE",
+        help="parallel modes to run (default: all)",
+    )
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        type=int,
+        default=sorted({1, multiprocessing.cpu_count()}),
+        metavar="N",
+        help="worker counts for the parallel modes (default: 1 and cpu count)",
+    )
+    parser.add_argument(
+        "--positions",
+        nargs="+",
+        choices=list(POSITIONS),
+        default=list(POSITIONS),
+    )
+    parser.add_argument("--time-limit", type=float, default=settings.TIME_LIMIT)
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=10**9,
+        help="iteration cap per search (default: time bound only)",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument(
+        "--threat-budget",
+        type=int,
+        default=settings.THREAT_NODE_BUDGET,
+        help="threat solver nodes before searching (0: search every position)",
+    )
+    parser.add_argument(
+        "--no-ladder", action="store_true", help="skip the time-to-correct runs"
+    )
+    parser.add_argument("--out", type=str, default=None, help="output JSON path")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("BASE", "NEW"),
+        help="compare two result files instead of running",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    meta = metadata(args)
+    results = run_benchmark(args)
+
+    path = args.out
+    if path is None:
+        commit = (meta["commit"] or "nogit")[:8]
+        now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = f"./data/bench_{commit}_{now}.json"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=1)
+    print(f"wrote {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
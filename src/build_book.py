@@ -0,0 +1,111 @@
+"""
+Build the opening book from long self-play searches.
+
+    PYTHONPATH=src python -m build_book --depth 4 --branch 3 --time 20
+
+From the empty board, every position up to --depth plies is searched by a
+single-threaded Agent for --time seconds. Its most visited move goes in the
+book, and its --branch most visited moves lead to the positions of the next
+ply. Positions are deduplicated over the 8 board symmetries.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import sys
+
+from constants import BLACK
+from game.gamestate import GameState, opponent
+from game.opening_book import OpeningBook, book_entry
+from game.symmetry import canonical_hash
+from settings import OPENING_BOOK_PATH
+from src.game.agent import Agent
+
+
+Moves = tuple[tuple[int, int], ...]
+
+
+def search_position(job: tuple[Moves, float, int]) -> tuple[Moves, tuple, list]:
+    """(moves, best move, [(move, visits)] of the top branch moves)"""
+    moves, time_limit, branch = job
+    state = replay(moves)
+    agent = Agent(state.current_player, time_limit, 10**9)
+    try:
+        best = agent.select_move(state)
+    finally:
+        agent.close()
+    stats = agent.last_stats
+    if stats is not None and stats.root_visits:
+        top = stats.top_moves(branch)
+    else:  # no stats, or a forced move played without searching
+        top = [(best, 1)]
+    return moves, (int(best[0]), int(best[1])), top
+
+
+def replay(moves: Moves) -> GameState:
+    state = GameState(current_player=BLACK)
+    for move in moves:
+        state.apply_move(move)
+        state.current_player = opponent(state.current_player)
+    return state
+
+
+def build(args: argparse.Namespace) -> dict[int, tuple[int, int]]:
+    entries: dict[int, tuple[int, int]] = {}
+    level: list[Moves] = [()]
+    pool = mp.Pool(args.jobs) if args.jobs > 1 else None
+    try:
+        for ply in range(args.depth):
+            jobs = [(moves, args.time, args.branch) for moves in level]
+            if pool is not None:
+                results = pool.imap_unordered(search_position, jobs)
+            else:
+                results = map(search_position, jobs)
+            next_level: dict[int, Moves] = {}
+            for moves, best, top in results:
+                state = replay(moves)
+                key, cell = book_entry(state, best)
+                visits = dict(top).get(best, 1)
+                entries[key] = (cell, visits)
+                for move, _ in top:
+                    child = replay(moves + (move,))
+                    if child.is_terminal:
+                        continue
+                    child_key, _ = canonical_hash(child)
+                    if child_key not in entries:
+                        next_level.setdefault(child_key, moves + (move,))
+            print(f"ply {ply}: {len(level)} positions, book {len(entries)}", flush=True)
+            level = list(next_level.values())
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return entries
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the opening book")
+    parser.add_argument(
+        "--depth", type=int, default=4, help="plies from the empty board"
+    )
+    parser.add_argument(
+        "--branch", type=int, default=3, help="moves followed per position"
+    )
+    parser.add_argument(
+        "--time", type=float, default=20.0, help="seconds per position"
+    )
+    parser.add_argument("--jobs", type=int, default=mp.cpu_count())
+    parser.add_argument("--out", type=str, default=OPENING_BOOK_PATH)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    entries = build(args)
+    OpeningBook.write(args.out, entries)
+    print(f"wrote {len(entries)} positions to {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
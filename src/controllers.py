@@ -1,8 +1,9 @@
 from typing import Callable
 from src.game.agent import Agent
-from src.game.gamestate import GameState
+from src.game.gamestate import GameState, opponent
+from src.game.opening_book import load_book
 from src.parallel.mode import ParallelMode
-from src.settings import N_ITERATION, TIME_LIMIT
+from src.settings import N_ITERATION, OPENING_BOOK_PATH, TIME_LIMIT
 
 
 def human_controller(state: GameState) -> tuple[int, int]:
@@ -18,26 +19,39 @@ def human_controller(state: GameState) -> tuple[int, int]:
 
 
 def make_ai_controller(
-    player_id: int, parallel_mode: ParallelMode, n_workers: int = 1
+    player_id: int,
+    parallel_mode: ParallelMode,
+    n_workers: int = 1,
+    ponder: bool = False,
 ) -> Callable[[GameState], tuple[int, int]]:
     """
-    - Stateless: creates a new Agent instance every turn
+    - Stateful: one Agent for the whole game, so its search tree carries over
+      from one turn to the next
+    - ponder: keep searching on the opponent's time, from the position after
+      the returned move (meant for a human opponent: two pondering AIs in
+      one process would slow each other down)
     - Returns the coordinate tuple selected by the AI
     """
+    ai = Agent(
+        player_id=player_id,
+        time_limit=TIME_LIMIT,
+        n_iteration=N_ITERATION,
+        parallel_mode=parallel_mode,
+        n_workers=n_workers,
+        book=load_book(OPENING_BOOK_PATH),
+    )
 
     def _ai_controller(state: GameState) -> tuple[int, int]:
-        ai = Agent(
-            player_id=player_id,
-            time_limit=TIME_LIMIT,
-            n_iteration=N_ITERATION,
-            parallel_mode=parallel_mode,
-            n_workers=n_workers,
-        )
         print(
             f"AI is thinking about the next move... (time limit: {TIME_LIMIT} seconds)"
         )
         move = ai.select_move(state)
         print("AI has placed its move.")
+        if ponder:
+            next_state = state.clone()
+            next_state.apply_move(move)
+            next_state.current_player = opponent(next_state.current_player)
+            ai.start_pondering(next_state)
         return move
 
     return _ai_controller
@@ -1,17 +1,50 @@
 # agent.py
 from __future__ import annotations
 
+import threading
+import time
+
 from game.gamestate import GameState
 from parallel.runner import parallel_mcts
-from src.game.mctree import MCTree
+from src.game.array_tree import ArrayMCTree
+from src.game.mctree import MCTree, RolloutParams
+from src.game.opening_book import OpeningBook
+from src.game.search_stats import SearchStats
+from src.game.threats import solve as solve_threats
+from src.game.time_manager import SearchClock, TimeManager
+from src.game.tree_snapshot import load_snapshot, write_snapshot
+from src.parallel.strategy_leaf import StrategyLeaf
 from src.parallel.strategy_root import StrategyRoot
 from src.parallel.strategy_tree import StrategyTree
 from src.parallel.mode import ParallelMode
+from src.parallel.worker_pool import LeafWorkerPool, RootWorkerPool
+from src.settings import (
+    EARLY_STOP,
+    PONDER_MAX_ITERATION,
+    SEARCH_STATS,
+    THREAT_NODE_BUDGET,
+    TIME_BANK,
+    TREE_STORAGE,
+    TT_CAPACITY,
+)
+
+# single thread tree class per settings.TREE_STORAGE
+TREE_STORAGE_MAP = {
+    "node": MCTree,
+    "array": ArrayMCTree,
+}
+
+# process pool class for the modes that keep one across moves
+WORKER_POOL_MAP = {
+    ParallelMode.ROOT: RootWorkerPool,
+    ParallelMode.LEAF: LeafWorkerPool,
+}
 
 # strategy class map
 PARALLEL_MODE_MAP = {
     ParallelMode.ROOT: StrategyRoot,
     ParallelMode.TREE: StrategyTree,
+    ParallelMode.LEAF: StrategyLeaf,
     ParallelMode.NONE: None,
 }
 
@@ -24,28 +57,200 @@ class Agent:
         n_iteration: int,
         parallel_mode: ParallelMode = ParallelMode.NONE,
         n_workers: int = 1,
+        pool: RootWorkerPool | LeafWorkerPool | None = None,
+        rollout_params: RolloutParams = RolloutParams(),
+        book: OpeningBook | None = None,
+        threat_budget: int = THREAT_NODE_BUDGET,
+        time_bank: float | None = TIME_BANK,
+        snapshot: str | None = None,
+        early_stop: bool = EARLY_STOP,
     ):
         self.player_id = player_id
         self.time_limit = time_limit
         self.n_iteration = n_iteration
         self.n_workers = n_workers
         self.parallel_mode = parallel_mode
+        self.rollout_params = rollout_params
+        # positions in the book are answered without searching
+        self.book = book
+        # forced wins / defences are played before searching (0: off)
+        self.threat_budget = threat_budget
+        # per-move budgets, early stopping, the game's time bank (if any)
+        self.time_manager = TimeManager(
+            time_limit, n_iteration, time_bank, early_stop=early_stop
+        )
         if self.parallel_mode not in PARALLEL_MODE_MAP:
             raise ValueError(f"unknown parallel_mode: {parallel_mode}")
+        # tree snapshot file the first search resumes from, if it exists
+        # (single thread: ArrayMCTree; root parallel: every worker)
+        if snapshot is not None and self.parallel_mode not in (
+            ParallelMode.NONE,
+            ParallelMode.ROOT,
+        ):
+            raise ValueError("snapshots resume in none / root parallel mode only")
+        self.snapshot = snapshot
+        # kept across turns so the subtree of the actual game continues
+        # (root parallel workers keep their own trees in the pool)
+        self._tree: MCTree | None = None
+        # root / leaf parallel: warm worker pool kept for the whole game; may
+        # be passed in to share it between agents and games
+        self._pool = pool
+        self._owns_pool = False
+        # stats of the last select_move (None when settings.SEARCH_STATS is off)
+        self.last_stats: SearchStats | None = None
+        # background search on the opponent's time (start_pondering)
+        self._ponder_thread: threading.Thread | None = None
+        self._ponder_stop = threading.Event()
+        self.ponder_stats: SearchStats | None = None
 
     def select_move(self, state: GameState) -> tuple[int, int]:
+        # the pondered subtree of state is picked up by reset_root
+        self.stop_pondering()
+        start = time.perf_counter()
+        if self.book is not None:
+            move = self.book.lookup(state)
+            if move is not None:
+                return self._answer_without_search(move, "book", start)
+        if self.threat_budget:
+            forced = solve_threats(state, self.threat_budget)
+            if forced is not None:
+                return self._answer_without_search(forced.move, forced.reason, start)
+
+        clock = self.time_manager.start(state.occupy_bitset.bit_count())
+        move = self._search(state, clock)
+        self.time_manager.finish(clock)
+        if self.last_stats is not None:
+            self.last_stats.stop_reason = clock.reason
+        return move
+
+    def _search(self, state: GameState, clock: SearchClock) -> tuple[int, int]:
         StrategyCls = PARALLEL_MODE_MAP[self.parallel_mode]
 
         # single thread
         if StrategyCls is None:
-            tree = MCTree(self.time_limit, self.n_iteration, thread_safe=False)
-            return tree.run_single_thread(state)
+            if self._tree is None:
+                saved = load_snapshot(self.snapshot) if self.snapshot else None
+                if saved is not None:
+                    self._tree = ArrayMCTree.from_snapshot(
+                        saved,
+                        self.time_limit,
+                        self.n_iteration,
+                        rollout_params=self.rollout_params,
+                    )
+                else:
+                    TreeCls = TREE_STORAGE_MAP[TREE_STORAGE]
+                    self._tree = TreeCls(
+                        self.time_limit,
+                        self.n_iteration,
+                        thread_safe=False,
+                        rollout_params=self.rollout_params,
+                    )
+            move = self._tree.run_single_thread(state, clock)
+            self.last_stats = self._tree.stats
+            return move
 
-        # multi-thread (root / tree)
+        # parallel (root / tree / leaf)
+        kwargs = {}
+        PoolCls = WORKER_POOL_MAP.get(self.parallel_mode)
+        if PoolCls is not None:
+            if self._pool is None:
+                if self.parallel_mode == ParallelMode.ROOT:
+                    self._pool = PoolCls(self.n_workers, self.snapshot)
+                else:
+                    self._pool = PoolCls(self.n_workers)
+                self._owns_pool = True
+            kwargs["pool"] = self._pool
+        # tree threads share nodes; leaf parallel touches the tree from one thread
+        thread_safe = self.parallel_mode == ParallelMode.TREE
         strategy = StrategyCls(
             n_workers=self.n_workers,
             n_iteration=self.n_iteration,
-            time_limit=self.time_limit,
-            thread_safe = True
+            time_limit=clock.soft,
+            thread_safe=thread_safe,
+            clock=clock,
+            **kwargs,
         )
-        return parallel_mcts(state, strategy)
+        if self._tree is None:
+            # root parallel searches in the workers; its tree only holds the stats
+            is_root = self.parallel_mode == ParallelMode.ROOT
+            self._tree = MCTree(
+                self.time_limit,
+                self.n_iteration,
+                thread_safe=thread_safe,
+                tt_capacity=0 if is_root else TT_CAPACITY,
+                rollout_params=self.rollout_params,
+            )
+        move = parallel_mcts(state, strategy, self._tree)
+        self.last_stats = self._tree.stats
+        return move
+
+    def save_snapshot(self, path: str) -> int:
+        """
+        Write the search tree to path (tree_snapshot.py); returns its node
+        count. Root parallel trees live in the workers and cannot be saved.
+        """
+        self.stop_pondering()
+        if self.parallel_mode == ParallelMode.ROOT:
+            raise ValueError("root parallel trees are kept in the workers")
+        if self._tree is None:
+            raise ValueError("no search tree yet")
+        return write_snapshot(path, self._tree)
+
+    def start_pondering(self, state: GameState) -> bool:
+        """
+        Keep searching `state` (the position after our move, opponent to
+        play) in a background thread until the next select_move or
+        stop_pondering, so the opponent's reply is already explored.
+        Root parallel keeps its trees in the workers and does not ponder.
+        Returns whether a search was started.
+        """
+        self.stop_pondering()
+        tree = self._tree
+        if tree is None or state.is_terminal:
+            return False
+        if self.parallel_mode == ParallelMode.ROOT:
+            return False
+
+        tree.reset_root(state)
+        tree.start_stats()
+        self._ponder_stop.clear()
+
+        def ponder():
+            i = 0
+            while not self._ponder_stop.is_set() and i < PONDER_MAX_ITERATION:
+                tree.do_iteration()
+                i += 1
+
+        self._ponder_thread = threading.Thread(
+            target=ponder, name="ponder", daemon=True
+        )
+        self._ponder_thread.start()
+        return True
+
+    def stop_pondering(self) -> None:
+        """Stop the background search (after its current iteration)"""
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        assert self._tree is not None
+        self.ponder_stats = self._tree.finish_stats()
+
+    def _answer_without_search(
+        self, move: tuple[int, int], decided_by: str, start: float
+    ) -> tuple[int, int]:
+        self.last_stats = None
+        if SEARCH_STATS:
+            self.last_stats = SearchStats(
+                elapsed=time.perf_counter() - start, decided_by=decided_by
+            )
+        return move
+
+    def close(self) -> None:
+        """Stop pondering; release the worker pool if this agent created it"""
+        self.stop_pondering()
+        if self._owns_pool and self._pool is not None:
+            self._pool.close()
+        self._pool = None
+        self._owns_pool = False
@@ -0,0 +1,371 @@
+"""
+Struct-of-arrays tree storage for single-threaded search.
+
+Every node is an index into flat `array` buffers (visits, rewards, priors,
+move, parent, first child, next sibling, untried-move queue) that grow in
+chunks, instead of a Node object holding its own GameState. A node's
+position is rebuilt by replaying the moves from the root on one scratch
+state per iteration.
+"""
+
+from __future__ import annotations
+
+from array import array
+import math
+import random
+
+import numpy as np
+
+from constants import EPSILON
+from game.batch_heuristic import move_scores
+from game.gamestate import BOARD_N_BITS, GameState, opponent
+from game.mctree import C, K_PB, MCTree, RolloutParams
+from settings import BOARD_LENGTH, DEBUG_MODE, SEARCH_STATS, SYMMETRY_PRUNING
+from src.game import metrics
+from src.game.symmetry import prune_symmetric
+from src.game.time_manager import SearchClock, top_two
+from src.game.tree_snapshot import TreeSnapshot, subtree_records
+
+CHUNK = 4096  # nodes added per buffer growth
+NO_NODE = -1
+
+# per-node buffers: name -> array typecode
+_NODE_FIELDS = {
+    "n_visit": "i",
+    "total_reward": "d",
+    "prior": "d",
+    "move": "h",  # cell index, -1 for the root
+    "parent": "i",
+    "first_child": "i",
+    "next_sibling": "i",
+    "queue_start": "i",  # offset in queue_moves, -1 until ranked
+    "queue_len": "h",
+    "n_tried": "h",
+}
+
+
+class ArrayTree:
+    """Node store; children are a linked list (first_child / next_sibling)"""
+
+    def __init__(self, chunk: int = CHUNK):
+        self.chunk = chunk
+        self.size = 0
+        self.capacity = 0
+        for name, code in _NODE_FIELDS.items():
+            setattr(self, name, array(code))
+        # ranked untried moves of every expanded node, with their scores
+        self.queue_moves = array("h")
+        self.queue_scores = array("d")
+        self._grow()
+
+    def _grow(self) -> None:
+        for name, code in _NODE_FIELDS.items():
+            buf: array = getattr(self, name)
+            buf.frombytes(bytes(buf.itemsize * self.chunk))
+        self.capacity += self.chunk
+
+    @classmethod
+    def from_records(
+        cls, nodes: np.ndarray, queue: np.ndarray, chunk: int = CHUNK
+    ) -> ArrayTree:
+        """Buffers filled with NODE_DTYPE / QUEUE_DTYPE records, copied in bulk"""
+        tree = cls.__new__(cls)
+        tree.chunk = chunk
+        tree.size = tree.capacity = len(nodes)
+        for name, code in _NODE_FIELDS.items():
+            buf = array(code)
+            buf.frombytes(nodes[name].astype(buf.typecode).tobytes())
+            setattr(tree, name, buf)
+        tree.queue_moves = array("h", queue["move"].astype(np.int16).tobytes())
+        tree.queue_scores = array("d", queue["score"].astype(np.float64).tobytes())
+        tree._grow()
+        return tree
+
+    @classmethod
+    def from_snapshot(cls, snapshot: TreeSnapshot, chunk: int = CHUNK) -> ArrayTree:
+        return cls.from_records(snapshot.nodes, snapshot.queue, chunk)
+
+    def compact(self, root: int) -> ArrayTree:
+        """New store holding only the subtree under root, which becomes node 0"""
+        return self.from_records(*subtree_records(self, root), self.chunk)
+
+    def add_node(self, move: int, parent: int, prior: float) -> int:
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        self.size += 1
+        if SEARCH_STATS:
+            metrics.nodes_created += 1
+        self.n_visit[i] = 0
+        self.total_reward[i] = 0.0
+        self.prior[i] = prior
+        self.move[i] = move
+        self.parent[i] = parent
+        self.first_child[i] = NO_NODE
+        self.queue_start[i] = NO_NODE
+        self.queue_len[i] = 0
+        self.n_tried[i] = 0
+        if parent == NO_NODE:
+            self.next_sibling[i] = NO_NODE
+        else:
+            self.next_sibling[i] = self.first_child[parent]
+            self.first_child[parent] = i
+        return i
+
+    def children(self, i: int) -> list[int]:
+        out = []
+        c = self.first_child[i]
+        while c != NO_NODE:
+            out.append(c)
+            c = self.next_sibling[c]
+        return out
+
+    def is_ranked(self, i: int) -> bool:
+        return self.queue_start[i] != NO_NODE
+
+    def is_fully_expanded(self, i: int) -> bool:
+        return self.queue_start[i] != NO_NODE and self.n_tried[i] == self.queue_len[i]
+
+    def set_queue(self, i: int, moves: np.ndarray, scores: np.ndarray) -> None:
+        self.queue_start[i] = len(self.queue_moves)
+        self.queue_len[i] = len(moves)
+        self.queue_moves.frombytes(moves.astype(np.int16).tobytes())
+        self.queue_scores.frombytes(scores.astype(np.float64).tobytes())
+
+    def nbytes(self) -> int:
+        """Bytes held by all buffers (allocated capacity)"""
+        total = sum(
+            getattr(self, name).itemsize * len(getattr(self, name))
+            for name in _NODE_FIELDS
+        )
+        return total + self.queue_moves.itemsize * len(self.queue_moves) + (
+            self.queue_scores.itemsize * len(self.queue_scores)
+        )
+
+
+class ArrayMCTree(MCTree):
+    """
+    MCTree over an ArrayTree: same search (PB-UCB1 selection, top-k
+    expansion from the batch scores, blended evaluation) and the same
+    run_single_thread / reset_root interface, single-threaded only.
+    There is no `root` Node and no transposition table here.
+    """
+
+    nodes: ArrayTree
+    root_index: int
+    root_state: GameState | None
+
+    def __init__(
+        self,
+        time_limit: float,
+        n_iteration: int,
+        *,
+        thread_safe: bool = False,
+        tt_capacity: int = 0,
+        rollout_params: RolloutParams = RolloutParams(),
+    ):
+        if thread_safe:
+            raise ValueError("ArrayMCTree is single-threaded")
+        super().__init__(
+            time_limit, n_iteration, tt_capacity=0, rollout_params=rollout_params
+        )
+        self.nodes = ArrayTree()
+        self.root_index = NO_NODE
+        self.root_state = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: TreeSnapshot, *args, **kwargs) -> ArrayMCTree:
+        """
+        Tree resuming the snapshot's search (other arguments as __init__):
+        the next search of its root position, or of a position up to two
+        moves below, continues from the saved statistics.
+        """
+        tree = cls(*args, **kwargs)
+        tree.nodes = ArrayTree.from_snapshot(snapshot)
+        tree.root_index = 0
+        tree.root_state = snapshot.root_state.clone()
+        return tree
+
+    def run_single_thread(
+        self, state: GameState, clock: SearchClock | None = None
+    ) -> tuple[int, int]:
+        self.start_stats()
+        self.reset_root(state)
+        if clock is None:
+            clock = SearchClock(self.time_limit, self.n_iteration)
+        i = 0
+
+        while clock.stop_reason(i, self.top_two_visits) is None:
+            self.do_iteration()
+            i += 1
+
+        if DEBUG_MODE:
+            print(f"iteration 횟수: {i}, tree bytes: {self.nodes.nbytes()}")
+
+        best = self.most_visited_child(self.root_index)
+        assert best != NO_NODE
+        self.finish_stats()
+        return self._cell_move(self.nodes.move[best])
+
+    def reset_root(self, state: GameState, max_depth: int = 2) -> int:
+        """
+        Continue from the node of state if the previous search reached it.
+        The kept subtree is copied into fresh buffers (ArrayTree.compact), so
+        the rest of the tree is freed and memory follows the live tree.
+        """
+        found = NO_NODE
+        if self.root_state is not None:
+            found = self._find_descendant(state, max_depth)
+        if found == NO_NODE:
+            self.nodes = ArrayTree(self.nodes.chunk)
+            found = self.nodes.add_node(NO_NODE, NO_NODE, 0.0)
+        elif found != self.root_index:
+            self.nodes = self.nodes.compact(found)
+            found = 0
+        self.nodes.parent[found] = NO_NODE
+        self.root_index = found
+        self.root_state = state.clone()
+        return found
+
+    def do_iteration(self):
+        nodes = self.nodes
+        assert self.root_state is not None
+        state = self.root_state.clone()
+        i = self.root_index
+
+        # selection, replaying the path on the scratch state
+        depth = 0
+        with self._phase("select"):
+            while not state.is_terminal and nodes.is_fully_expanded(i):
+                i = self.best_child(i)
+                self._play(state, nodes.move[i])
+                depth += 1
+
+        if state.is_terminal:
+            reward = self._terminal_value(state)
+        else:
+            with self._phase("expand"):
+                i = self.expand(i, state, top_k=5)
+            depth += 1
+            reward = self.evaluate(state)
+        if self.stats is not None:
+            self.stats.observe_depth(depth)
+        self.backpropagate_index(i, reward)
+
+    def expand(self, i: int, state: GameState, top_k: int = 3) -> int:
+        """Add a child among the top k untried moves and play it on state"""
+        nodes = self.nodes
+        if not nodes.is_ranked(i):
+            scores = move_scores(state, state.current_player)
+            order = np.argsort(-scores, kind="stable")
+            order = order[: BOARD_N_BITS - state.occupy_bitset.bit_count()]
+            if SYMMETRY_PRUNING:
+                order = prune_symmetric(order, state)
+            nodes.set_queue(i, order, scores[order])
+
+        start, n_tried = nodes.queue_start[i], nodes.n_tried[i]
+        n_untried = nodes.queue_len[i] - n_tried
+        if not n_untried:
+            raise RuntimeError("expand on fully-expanded node")
+        head = start + n_tried
+        pick = head + random.randrange(min(top_k, n_untried))
+        moves, scores = nodes.queue_moves, nodes.queue_scores
+        moves[head], moves[pick] = moves[pick], moves[head]
+        scores[head], scores[pick] = scores[pick], scores[head]
+        nodes.n_tried[i] = n_tried + 1
+
+        child = nodes.add_node(moves[head], i, scores[head])
+        self._play(state, moves[head])
+        return child
+
+    def best_child(self, i: int, k: float = K_PB, c: float = C) -> int:
+        """PB-UCB1 over the children of i (same formula as MCTree._pb_ucb1)"""
+        nodes = self.nodes
+        log_parent = math.log(nodes.n_visit[i]) if nodes.n_visit[i] > 0 else 0.0
+        best_score = -float("inf")
+        best_nodes: list[int] = []
+        ch = nodes.first_child[i]
+        while ch != NO_NODE:
+            n = nodes.n_visit[ch]
+            if n == 0:
+                score = float("inf")
+            else:
+                alpha = k / (k + n)
+                q = nodes.total_reward[ch] / n
+                score = (1 - alpha) * q + alpha * nodes.prior[ch]
+                score += c * math.sqrt(log_parent / n)
+            if score > best_score + EPSILON:
+                best_score = score
+                best_nodes = [ch]
+            elif abs(score - best_score) < EPSILON:
+                best_nodes.append(ch)
+            ch = nodes.next_sibling[ch]
+        return random.choice(best_nodes)
+
+    def most_visited_child(self, i: int) -> int:
+        nodes = self.nodes
+        children = nodes.children(i)
+        if not children:
+            return NO_NODE
+        return max(children, key=lambda ch: nodes.n_visit[ch])
+
+    def backpropagate_index(self, i: int, reward: float):
+        if SEARCH_STATS:
+            metrics.iterations += 1
+        nodes = self.nodes
+        cur_reward = reward
+        with self._phase("backpropagate"):
+            while i != NO_NODE:
+                nodes.n_visit[i] += 1
+                nodes.total_reward[i] += cur_reward
+                cur_reward = -cur_reward
+                i = nodes.parent[i]
+
+    # internal -----------------------------------------------------------------
+
+    def top_two_visits(self) -> list[int]:
+        n_visit = self.nodes.n_visit
+        return top_two(n_visit[ch] for ch in self.nodes.children(self.root_index))
+
+    def root_child_stats(self) -> list[tuple[tuple[int, int], int, float]]:
+        nodes = self.nodes
+        return [
+            (self._cell_move(nodes.move[ch]), nodes.n_visit[ch], nodes.total_reward[ch])
+            for ch in nodes.children(self.root_index)
+        ]
+
+    def _root_visits(self) -> dict[tuple[int, int], int]:
+        if self.root_index == NO_NODE:
+            return {}
+        return {
+            self._cell_move(self.nodes.move[ch]): self.nodes.n_visit[ch]
+            for ch in self.nodes.children(self.root_index)
+        }
+
+    def _find_descendant(self, state: GameState, max_depth: int) -> int:
+        assert self.root_state is not None
+        frontier = [(self.root_index, self.root_state)]
+        for _ in range(max_depth + 1):
+            for i, s in frontier:
+                if (
+                    s.occupy_bitset == state.occupy_bitset
+                    and s.color_bitset == state.color_bitset
+                    and s.current_player == state.current_player
+                ):
+                    return i
+            next_frontier = []
+            for i, s in frontier:
+                for ch in self.nodes.children(i):
+                    child_state = s.clone()
+                    self._play(child_state, self.nodes.move[ch])
+                    next_frontier.append((ch, child_state))
+            frontier = next_frontier
+        return NO_NODE
+
+    @staticmethod
+    def _cell_move(cell: int) -> tuple[int, int]:
+        return cell % BOARD_LENGTH, cell // BOARD_LENGTH
+
+    def _play(self, state: GameState, cell: int) -> None:
+        state.apply_move(self._cell_move(cell))
+        state.current_player = opponent(state.current_player)
@@ -0,0 +1,188 @@
+"""
+Score of every empty cell at once:
+    scores[idx(x, y)] == heuristic_evaluate(state after (x, y), player)
+
+Placing a stone only changes the runs on the four lines through it, so each
+cell's score is the current score plus a delta read from the stones at
+offsets 1..5 on both sides of the cell along every direction.
+"""
+
+import numpy as np
+
+from constants import BLACK, DIRS, WIN_STONE_CNT
+from game.gamestate import BOARD_N_BITS, N_OPEN_KIND, GameState, center_value
+from game.heuristic import (
+    CENTER_WEIGHT,
+    MY_PATTERN_WEIGHTS,
+    OPP_PATTERN_WEIGHTS,
+    heuristic_evaluate,
+)
+from settings import BOARD_LENGTH, SEARCH_STATS
+from src.game import metrics
+
+_PAD = WIN_STONE_CNT
+_PADDED = BOARD_LENGTH + 2 * _PAD
+_N_BYTES = (BOARD_N_BITS + 7) // 8
+
+# cell codes on the padded board
+_EMPTY, _MINE, _THEIRS, _OFF = 0, 1, 2, 3
+
+
+def _offset_index(sign: int) -> np.ndarray:
+    """[k, dir, cell] -> flat padded index of cell + sign * (k + 1) * dir"""
+    ys, xs = np.divmod(np.arange(BOARD_N_BITS), BOARD_LENGTH)
+    index = np.empty((_PAD, len(DIRS), BOARD_N_BITS), dtype=np.intp)
+    for k in range(_PAD):
+        for d, (dx, dy) in enumerate(DIRS):
+            step = sign * (k + 1)
+            index[k, d] = (ys + _PAD + step * dy) * _PADDED + (xs + _PAD + step * dx)
+    return index
+
+
+_BACK = _offset_index(-1)
+_FWD = _offset_index(1)
+# 1 where the reference scan counts a run as its growing prefixes
+AGAINST = np.array(
+    [[int(dy * BOARD_LENGTH + dx < 0)] for dx, dy in DIRS], dtype=np.intp
+)
+_CENTER_BONUS = CENTER_WEIGHT * np.array(
+    [center_value(i % BOARD_LENGTH, i // BOARD_LENGTH) for i in range(BOARD_N_BITS)],
+    dtype=np.float64,
+)
+
+
+def _run_score(
+    weights: list[int], against: int, length: int, left_open: int, right_open: int
+) -> int:
+    """Score of one run as counted by GameState._count_run (fives score 0 here)"""
+    if length == 0 or length >= WIN_STONE_CNT:
+        return 0
+
+    def w(k: int, open_cnt: int) -> int:
+        return weights[k * N_OPEN_KIND + open_cnt]
+
+    score = w(length, left_open + right_open)
+    if against:
+        score += sum(w(k, right_open) for k in range(1, length))
+    return score
+
+
+# What lies on one side of a cell (offsets 1..5 along a direction), as a code:
+#   0: empty neighbour, 1: off board,
+#   2..9: own run (length 1..4, far end open?), 10..17: opponent run (same)
+_SIDE_EMPTY, _SIDE_OFF, _SIDE_MINE, _SIDE_THEIRS = 0, 1, 2, 2 + 2 * (WIN_STONE_CNT - 1)
+N_SIDE = _SIDE_THEIRS + 2 * (WIN_STONE_CNT - 1)
+
+
+def _side_code(cells: list[int]) -> int:
+    near = cells[0]
+    if near == _EMPTY:
+        return _SIDE_EMPTY
+    if near == _OFF:
+        return _SIDE_OFF
+    length = 1
+    while length < WIN_STONE_CNT - 1 and cells[length] == near:
+        length += 1
+    base = _SIDE_MINE if near == _MINE else _SIDE_THEIRS
+    return base + 2 * (length - 1) + int(cells[length] == _EMPTY)
+
+
+def _side_run(side: int, base: int) -> tuple[int, int]:
+    """(length, far end open) of the run of the base color on that side"""
+    if not base <= side < base + 2 * (WIN_STONE_CNT - 1):
+        return 0, 0
+    return (side - base) // 2 + 1, (side - base) % 2
+
+
+# 5 cells with 4 codes each: pattern id = sum(code_k << 2k)
+_PATTERN_SHIFT = np.array([4**k for k in range(_PAD)], dtype=np.intp)
+SIDE_OF_PATTERN = np.array(
+    [_side_code([(pid >> (2 * k)) & 3 for k in range(_PAD)]) for pid in range(4**_PAD)],
+    dtype=np.intp,
+)
+
+
+def delta_tables(
+    my_w: list[int] = MY_PATTERN_WEIGHTS, opp_w: list[int] = OPP_PATTERN_WEIGHTS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [against, left side, right side] -> score change on that line when a stone
+    of the player is placed between, and whether it completes a five.
+    Own runs are scored with my_w and the opponent's with opp_w.
+    """
+    delta = np.zeros((2, N_SIDE, N_SIDE), dtype=np.int64)
+    wins = np.zeros((N_SIDE, N_SIDE), dtype=bool)
+    for left in range(N_SIDE):
+        for right in range(N_SIDE):
+            a, a_open = _side_run(left, _SIDE_MINE)
+            b, b_open = _side_run(right, _SIDE_MINE)
+            p, p_open = _side_run(left, _SIDE_THEIRS)
+            q, q_open = _side_run(right, _SIDE_THEIRS)
+            merged = a + 1 + b
+            lo = a_open if a else int(left == _SIDE_EMPTY)
+            ro = b_open if b else int(right == _SIDE_EMPTY)
+            wins[left, right] = merged >= WIN_STONE_CNT
+            for ag in (0, 1):
+                # own runs on each side merge through the new stone
+                mine = (
+                    _run_score(my_w, ag, merged, lo, ro)
+                    - _run_score(my_w, ag, a, a_open, 1)
+                    - _run_score(my_w, ag, b, 1, b_open)
+                )
+                # opponent runs touching the cell lose that open end
+                theirs = (
+                    _run_score(opp_w, ag, p, p_open, 0)
+                    - _run_score(opp_w, ag, p, p_open, 1)
+                    + _run_score(opp_w, ag, q, 0, q_open)
+                    - _run_score(opp_w, ag, q, 1, q_open)
+                )
+                delta[ag, left, right] = mine - theirs
+    return delta, wins
+
+
+_DELTA, _WINS = delta_tables()
+
+
+def _bits_to_plane(mask: int) -> np.ndarray:
+    bits = np.unpackbits(
+        np.frombuffer(mask.to_bytes(_N_BYTES, "little"), dtype=np.uint8),
+        count=BOARD_N_BITS,
+        bitorder="little",
+    )
+    return bits.astype(np.int8).reshape(BOARD_LENGTH, BOARD_LENGTH)
+
+
+def board_planes(state: GameState) -> tuple[np.ndarray, np.ndarray]:
+    """(black, white) int8 planes indexed [y, x]"""
+    occupy = _bits_to_plane(state.occupy_bitset)
+    black = _bits_to_plane(state.color_bitset)
+    return black, occupy - black
+
+
+def batch_move_scores(
+    black: np.ndarray, white: np.ndarray, player: int, base: float
+) -> np.ndarray:
+    """
+    Scores (player's view) of playing each cell for player, flat by idx.
+    base is heuristic_evaluate of the current position; occupied cells get -inf.
+    The position must not be terminal (no run of WIN_STONE_CNT on the board).
+    """
+    mine, theirs = (black, white) if player == BLACK else (white, black)
+    codes = np.full((_PADDED, _PADDED), _OFF, dtype=np.intp)
+    board = codes[_PAD:-_PAD, _PAD:-_PAD]
+    board[...] = _MINE * mine + _THEIRS * theirs
+    flat = codes.ravel()
+    left = SIDE_OF_PATTERN[np.tensordot(_PATTERN_SHIFT, flat[_BACK], axes=1)]
+    right = SIDE_OF_PATTERN[np.tensordot(_PATTERN_SHIFT, flat[_FWD], axes=1)]
+
+    scores = base + _CENTER_BONUS + _DELTA[AGAINST, left, right].sum(axis=0)
+    scores[_WINS[left, right].any(axis=0)] = 1e9
+    scores[board.ravel() != _EMPTY] = -np.inf
+    return scores
+
+
+def move_scores(state: GameState, player: int) -> np.ndarray:
+    if SEARCH_STATS:
+        metrics.batch_scores += 1
+    black, white = board_planes(state)
+    return batch_move_scores(black, white, player, heuristic_evaluate(state, player))
@@ -0,0 +1,172 @@
+"""
+Padded per-color bitboards for bit-parallel line detection.
+
+Rows are STRIDE = BOARD_LENGTH + 1 bits apart: the extra guard column is
+never set, so a window that would wrap from one row into the next always
+hits it. For a direction step `s` (SHIFTS), shifting a board by j * s lines
+up the j-th cell of every window with the window's first cell, so one AND
+over the shifted boards tests a pattern for every window at once.
+
+GameState keeps one such board per color (GameState.stones); its pattern
+counts and five detection are built on runs() and has_five_through().
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from itertools import combinations
+
+from constants import DIRS, WIN_STONE_CNT
+from settings import BOARD_LENGTH
+
+STRIDE = BOARD_LENGTH + 1
+SHIFTS = tuple(dy * STRIDE + dx for dx, dy in DIRS)
+_ROW = (1 << BOARD_LENGTH) - 1
+BOARD_MASK = sum(_ROW << (y * STRIDE) for y in range(BOARD_LENGTH))
+
+
+def _line_masks(dx: int, dy: int) -> tuple[int, ...]:
+    """[padded cell] -> every board cell on the line through it along (dx, dy)"""
+    masks = [0] * (BOARD_LENGTH * STRIDE)
+    for y in range(BOARD_LENGTH):
+        for x in range(BOARD_LENGTH):
+            if masks[y * STRIDE + x]:
+                continue
+            cx, cy = x, y
+            while 0 <= cx - dx < BOARD_LENGTH and 0 <= cy - dy < BOARD_LENGTH:
+                cx, cy = cx - dx, cy - dy
+            cells = []
+            while 0 <= cx < BOARD_LENGTH and 0 <= cy < BOARD_LENGTH:
+                cells.append(cy * STRIDE + cx)
+                cx, cy = cx + dx, cy + dy
+            line = sum(1 << p for p in cells)
+            for p in cells:
+                masks[p] = line
+    return tuple(masks)
+
+
+# [direction][padded cell]: the only cells whose runs a stone there can change
+LINE_MASKS = tuple(_line_masks(dx, dy) for dx, dy in DIRS)
+
+
+def pad(bitset: int) -> int:
+    """GameState bitset (idx = y * BOARD_LENGTH + x) -> padded bitboard"""
+    out = 0
+    for y in range(BOARD_LENGTH):
+        out |= ((bitset >> (y * BOARD_LENGTH)) & _ROW) << (y * STRIDE)
+    return out
+
+
+def cell_of(p: int) -> tuple[int, int]:
+    """(x, y) of padded bit index p"""
+    return p % STRIDE, p // STRIDE
+
+
+def bit_of(x: int, y: int) -> int:
+    return 1 << (y * STRIDE + x)
+
+
+def iter_bits(board: int):
+    """Padded indices of the set bits, lowest first"""
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+
+def shift(board: int, n: int) -> int:
+    """Bit p of the result is bit p + n of board"""
+    return board >> n if n >= 0 else (board << -n) & BOARD_MASK
+
+
+def unshift(board: int, n: int) -> int:
+    """Inverse of shift: bit p + n of the result is bit p of board"""
+    return (board << n) & BOARD_MASK if n >= 0 else board >> -n
+
+
+def runs(own: int, empty: int, step: int):
+    """
+    (length, left_open, right_open, count) of the maximal runs of own along
+    step, left being the -step end. All runs are measured together: AND-ing
+    the run heads with own shifted by 1, 2, .. steps keeps the runs that are
+    at least that long, so the loop runs once per length present.
+    """
+    left_open = unshift(empty, step)  # bit p: cell p - step is empty
+    at_least = own & ~unshift(own, step)  # run heads
+    length = 0
+    while at_least:
+        length += 1
+        longer = at_least & shift(own, length * step)
+        exact = at_least & ~longer
+        if exact:
+            right_open = shift(empty, length * step)
+            for lo, heads in ((0, exact & ~left_open), (1, exact & left_open)):
+                if not heads:
+                    continue
+                n_open = (heads & right_open).bit_count()
+                if n_open:
+                    yield length, lo, 1, n_open
+                if n_open != heads.bit_count():
+                    yield length, lo, 0, heads.bit_count() - n_open
+        at_least = longer
+
+
+def has_five(own: int) -> bool:
+    """Whether own holds WIN_STONE_CNT stones in a row anywhere"""
+    for s in SHIFTS:
+        if _has_run(own, s):
+            return True
+    return False
+
+
+def has_five_through(own: int, p: int) -> bool:
+    """Whether a five of own runs through padded cell p (only its four lines)"""
+    for d, s in enumerate(SHIFTS):
+        line = own & LINE_MASKS[d][p]
+        if line.bit_count() >= WIN_STONE_CNT and _has_run(line, s):
+            return True
+    return False
+
+
+def _has_run(own: int, s: int) -> bool:
+    chain = own
+    for k in range(1, WIN_STONE_CNT):
+        chain &= shift(own, k * s)
+        if not chain:
+            return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def window_slots(n_empty: int) -> tuple[tuple[tuple[int, ...], tuple[int, ...]], ...]:
+    """
+    (empty offsets, stone offsets) for every way to place n_empty empty
+    cells in a WIN_STONE_CNT window, offsets counted in steps from its start
+    """
+    slots = []
+    for empties in combinations(range(WIN_STONE_CNT), n_empty):
+        stones = tuple(k for k in range(WIN_STONE_CNT) if k not in empties)
+        slots.append((empties, stones))
+    return tuple(slots)
+
+
+def completion_cells(own: int, empty: int, n_empty: int) -> int:
+    """
+    Empty cells of every window holding WIN_STONE_CNT - n_empty own stones
+    and n_empty empty cells (no opponent stone). n_empty=1 gives the cells
+    completing a five, n_empty=2 the cells making a four.
+    """
+    out = 0
+    for s in SHIFTS:
+        own_at = [shift(own, k * s) for k in range(WIN_STONE_CNT)]
+        empty_at = [shift(empty, k * s) for k in range(WIN_STONE_CNT)]
+        for empties, stones in window_slots(n_empty):
+            starts = BOARD_MASK
+            for k in stones:
+                starts &= own_at[k]
+            for k in empties:
+                starts &= empty_at[k]
+            if starts:
+                for k in empties:
+                    out |= unshift(starts, k * s)
+    return out
@@ -0,0 +1,92 @@
+"""
+Bounded memo of heuristic_evaluate, one per process.
+
+Keyed by (GameState.zobrist, player): the score depends on the stones and
+the player it is seen from, not on the side to move. Repeats come from the
+N_ROLLOUT playouts of a leaf starting from the same position, the blended
+value of that leaf, and positions met again after reset_root.
+
+- At most `capacity` entries, least recently used evicted first.
+- hits / misses / evictions go to the metrics counters, so every
+  SearchStats (root-parallel workers included) reports its own share
+  (not counted when settings.SEARCH_STATS is off).
+- Worker processes inherit a copy of the parent's cache and fill their own.
+- Unlocked unless threads share it: tree parallel searches run inside
+  shared_by_threads().
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+import threading
+from typing import Iterator
+
+from src.game import metrics
+from src.settings import EVAL_CACHE_CAPACITY, SEARCH_STATS
+
+
+class EvalCache:
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._entries: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self._lock = _NO_LOCK
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[int, int]) -> float | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                if SEARCH_STATS:
+                    metrics.eval_misses += 1
+                return None
+            if SEARCH_STATS:
+                metrics.eval_hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[int, int], value: float) -> None:
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                if SEARCH_STATS:
+                    metrics.eval_evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def counters(self) -> dict[str, float]:
+        lookups = metrics.eval_hits + metrics.eval_misses
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": metrics.eval_hits,
+            "misses": metrics.eval_misses,
+            "evictions": metrics.eval_evictions,
+            "hit_rate": metrics.eval_hits / lookups if lookups else 0.0,
+        }
+
+
+_NO_LOCK = nullcontext()
+
+# this process's cache (None: disabled)
+cache = EvalCache(EVAL_CACHE_CAPACITY) if EVAL_CACHE_CAPACITY else None
+
+
+@contextmanager
+def shared_by_threads() -> Iterator[None]:
+    """Lock the cache while several threads of this process evaluate"""
+    if cache is None:
+        yield
+        return
+    cache._lock = threading.Lock()
+    try:
+        yield
+    finally:
+        cache._lock = _NO_LOCK
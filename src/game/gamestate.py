@@ -1,15 +1,76 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import random
 from typing import Optional
 
-from constants import DIRS, BLACK, WIN_STONE_CNT
+from constants import DIRS, BLACK, PLAYER_1, PLAYER_2, WHITE, WIN_STONE_CNT
 from settings import BOARD_LENGTH
-from src.game.bitset import bit, idx, set_bit
+from src.game.bitboard import (
+    BOARD_MASK,
+    LINE_MASKS,
+    SHIFTS,
+    STRIDE,
+    has_five_through,
+    pad,
+    runs,
+)
+from src.game.bitset import idx, set_bit, unset_bit
 from ui.console_renderer import ConsoleRenderer
 
 BOARD_N_BITS = BOARD_LENGTH * BOARD_LENGTH
 
+# pattern_counts layout: [color][length][open_cnt] flattened.
+# length is clipped to WIN_STONE_CNT, open_cnt is 0 (blocked) ~ 2 (open)
+N_OPEN_KIND = 3
+PATTERN_STRIDE = (WIN_STONE_CNT + 1) * N_OPEN_KIND
+N_PATTERN_SLOTS = 2 * PATTERN_STRIDE
+
+_EMPTY = -1
+_OFF_BOARD = -2
+
+# The reference full scan walks cells in index order and each line forward.
+# For directions whose forward step lowers the index (anti-diagonal) a run is
+# therefore counted as its growing prefixes 1, 2, .., L, not once.
+_SCAN_AGAINST = [dy * BOARD_LENGTH + dx < 0 for dx, dy in DIRS]
+_CENTER = BOARD_LENGTH // 2
+
+# Zobrist keys: [color][cell] per stone and [player] for the side to move.
+# Fixed seed so every process derives the same hashes.
+ZOBRIST_SEED = 0x5EED_60C0
+_zobrist_rng = random.Random(ZOBRIST_SEED)
+_ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(BOARD_N_BITS)] for _ in range(2)]
+_ZOBRIST_SIDE = [_zobrist_rng.getrandbits(64) for _ in range(2)]
+
+
+def pattern_slot(color: int, length: int, open_cnt: int) -> int:
+    return color * PATTERN_STRIDE + min(length, WIN_STONE_CNT) * N_OPEN_KIND + open_cnt
+
+
+def opponent(player: int) -> int:
+    return PLAYER_2 if player == PLAYER_1 else PLAYER_1
+
+
+def center_value(x: int, y: int) -> int:
+    return BOARD_LENGTH - (abs(x - _CENTER) + abs(y - _CENTER))
+
+
+def stones_hash(occupy_bitset: int, color_bitset: int) -> int:
+    """Zobrist hash of the stones only (GameState.zobrist)"""
+    h = 0
+    bits = occupy_bitset
+    while bits:
+        low = bits & -bits
+        i = low.bit_length() - 1
+        h ^= _ZOBRIST[(color_bitset >> i) & 1][i]
+        bits ^= low
+    return h
+
+
+def position_hash_of(occupy_bitset: int, color_bitset: int, player: int) -> int:
+    """GameState.position_hash() of a position given as bitsets"""
+    return stones_hash(occupy_bitset, color_bitset) ^ _ZOBRIST_SIDE[player]
+
 
 @dataclass(slots=True)
 class GameState:
@@ -19,6 +80,24 @@ class GameState:
     last_move: tuple[int, int] = (-1, -1)
     is_terminal: bool = False
     winner: int = -1
+    # incremental heuristic features (see heuristic.heuristic_evaluate)
+    pattern_counts: list[int] = field(default=None)  # type: ignore[assignment]
+    center_sum: list[int] = field(default=None)  # type: ignore[assignment]
+    # Zobrist hash of the stones only, see position_hash()
+    zobrist: int = field(default=None)  # type: ignore[assignment]
+    # padded bitboard per color, [WHITE, BLACK] (bitboard.py)
+    stones: list[int] = field(default=None)  # type: ignore[assignment]
+    # (move, last_move, is_terminal, winner, current_player) before each apply_move
+    move_stack: list[tuple] = field(default_factory=list)
+
+    def __post_init__(self):
+        if self.stones is None:
+            black = pad(self.color_bitset)
+            self.stones = [pad(self.occupy_bitset) & ~black, black]
+        if self.pattern_counts is None or self.center_sum is None:
+            self._rebuild_patterns()
+        if self.zobrist is None:
+            self._rebuild_zobrist()
 
     # --------------------------------------------------------------------- #
     #                   			interface                               #
@@ -57,14 +136,46 @@ class GameState:
         x, y = move
         if not self._is_empty(x, y):
             raise ValueError("Already occupied")
+        self.move_stack.append(
+            (move, self.last_move, self.is_terminal, self.winner, self.current_player)
+        )
+        p = y * STRIDE + x
+        self._update_patterns(p, -1)
         self.occupy_bitset = set_bit(self.occupy_bitset, x, y)
         if self.current_player == BLACK:
             self.color_bitset = set_bit(self.color_bitset, x, y)
-        else:
-            pass
+        self.stones[self.current_player] |= 1 << p
+        self._update_patterns(p, 1)
+        self.center_sum[self.current_player] += center_value(x, y)
+        self.zobrist ^= _ZOBRIST[self.current_player][idx(x, y)]
         self.last_move = move
         self._check_terminal()
 
+    def undo_move(self) -> None:
+        """Take back the latest apply_move, restoring the fields it changed"""
+        (
+            move,
+            self.last_move,
+            self.is_terminal,
+            self.winner,
+            self.current_player,
+        ) = self.move_stack.pop()
+        x, y = move
+        p = y * STRIDE + x
+        color = self._stone(x, y)
+        self._update_patterns(p, -1)
+        self.occupy_bitset = unset_bit(self.occupy_bitset, x, y)
+        self.color_bitset = unset_bit(self.color_bitset, x, y)
+        self.stones[color] &= ~(1 << p)
+        self._update_patterns(p, 1)
+        self.center_sum[color] -= center_value(x, y)
+        self.zobrist ^= _ZOBRIST[color][idx(x, y)]
+
+    def position_hash(self) -> int:
+        """Zobrist hash of the stones and the side to move"""
+        return self.zobrist ^ _ZOBRIST_SIDE[self.current_player]
+
+    # the move stack is not copied: a clone cannot undo past its creation
     def clone(self) -> GameState:
         return GameState(
             current_player=self.current_player,
@@ -73,6 +184,10 @@ class GameState:
             last_move=self.last_move,
             is_terminal=self.is_terminal,
             winner=self.winner,
+            pattern_counts=self.pattern_counts.copy(),
+            center_sum=self.center_sum.copy(),
+            zobrist=self.zobrist,
+            stones=self.stones.copy(),
         )
 
     # for debug
@@ -84,41 +199,66 @@ class GameState:
     #                   			internal                                #
     # --------------------------------------------------------------------- #
 
-    def _count_one_dir(self, x: int, y: int, dx: int, dy: int) -> int:
-        if self._is_empty(x, y) is True:
-            return 0
-        player = bit(self.color_bitset, x, y)
-        nx, ny = x + dx, y + dy
-        cnt = 0
-
-        while (
-            (0 <= nx < BOARD_LENGTH)
-            and (0 <= ny < BOARD_LENGTH)
-            and self._is_empty(nx, ny) is False
-            and bit(self.color_bitset, nx, ny) == player
-        ):
-            cnt += 1
-            nx += dx
-            ny += dy
-        return cnt
-
-    # by last move
+    # only the mover can have made a five (the position before had none)
     def _check_terminal(self) -> Optional[int]:
         if self.last_move is None:
             return None
         x, y = self.last_move
-        for dx, dy in DIRS:
-            count = (
-                self._count_one_dir(x, y, dx, dy)
-                + 1
-                + self._count_one_dir(x, y, -dx, -dy)
-            )
-            if count >= WIN_STONE_CNT:
-                self.is_terminal = True
-                self.winner = self.current_player
+        if has_five_through(self.stones[self.current_player], y * STRIDE + x):
+            self.is_terminal = True
+            self.winner = self.current_player
         if self.occupy_bitset.bit_count() == BOARD_N_BITS:
             self.is_terminal = True
 
+    # --------------------------------------------------------------------- #
+    #                   	   pattern counts                               #
+    # --------------------------------------------------------------------- #
+
+    def _stone(self, x: int, y: int) -> int:
+        if not (0 <= x < BOARD_LENGTH and 0 <= y < BOARD_LENGTH):
+            return _OFF_BOARD
+        i = idx(x, y)
+        if not (self.occupy_bitset >> i) & 1:
+            return _EMPTY
+        return (self.color_bitset >> i) & 1
+
+    def _count_runs(self, own: int, empty: int, color: int, d: int, sign: int) -> None:
+        """Add sign * the runs of own along DIRS[d] to the pattern counts"""
+        counts = self.pattern_counts
+        against = _SCAN_AGAINST[d]
+        for length, left_open, right_open, n in runs(own, empty, SHIFTS[d]):
+            if against:
+                for k in range(1, length):
+                    counts[pattern_slot(color, k, right_open)] += sign * n
+            counts[pattern_slot(color, length, left_open + right_open)] += sign * n
+
+    # only the four lines through padded cell p can change when it is played
+    def _update_patterns(self, p: int, sign: int) -> None:
+        white, black = self.stones
+        empty = BOARD_MASK & ~(white | black)
+        for d in range(len(DIRS)):
+            line = LINE_MASKS[d][p]
+            for color, own in ((WHITE, white & line), (BLACK, black & line)):
+                if own:
+                    self._count_runs(own, empty & line, color, d, sign)
+
+    def _rebuild_patterns(self) -> None:
+        self.pattern_counts = [0] * N_PATTERN_SLOTS
+        self.center_sum = [0, 0]
+        for i in range(BOARD_N_BITS):
+            if not (self.occupy_bitset >> i) & 1:
+                continue
+            x, y = i % BOARD_LENGTH, i // BOARD_LENGTH
+            self.center_sum[(self.color_bitset >> i) & 1] += center_value(x, y)
+        white, black = self.stones
+        empty = BOARD_MASK & ~(white | black)
+        for d in range(len(DIRS)):
+            self._count_runs(white, empty, WHITE, d, 1)
+            self._count_runs(black, empty, BLACK, d, 1)
+
+    def _rebuild_zobrist(self) -> None:
+        self.zobrist = stones_hash(self.occupy_bitset, self.color_bitset)
+
     # occupy bit = 1이면 False, 0이면 True
     def _is_empty(self, x, y):
         return not (self.occupy_bitset >> idx(x, y)) & 1
@@ -1,7 +1,8 @@
 
 from constants import DIRS, WIN_STONE_CNT
-from game.gamestate import BOARD_N_BITS, GameState
-from settings import BOARD_LENGTH
+from game.gamestate import BOARD_N_BITS, N_OPEN_KIND, PATTERN_STRIDE, GameState
+from settings import BOARD_LENGTH, SEARCH_STATS
+from src.game import eval_cache, metrics
 from src.game.bitset import bit, idx
 
 CENTER_WEIGHT = 5  # bonus weight for central positions
@@ -25,7 +26,71 @@ DANGEROUS_MULTIPLIER = {
 }
 
 
+
+def _pattern_weights(dangerous: bool) -> list[int]:
+    """Weight per pattern_counts slot of one color (five slots are handled apart)"""
+    weights = [0] * PATTERN_STRIDE
+    for length, weight_tuple in CLASSIC_HEURISTIC_WEIGHTS.items():
+        if length >= WIN_STONE_CNT:
+            continue
+        for open_cnt in range(N_OPEN_KIND):
+            w = weight_tuple[2 - open_cnt]
+            if dangerous:
+                w *= DANGEROUS_MULTIPLIER.get((length, open_cnt), 1)
+            weights[length * N_OPEN_KIND + open_cnt] = w
+    return weights
+
+
+MY_PATTERN_WEIGHTS = _pattern_weights(dangerous=False)
+OPP_PATTERN_WEIGHTS = _pattern_weights(dangerous=True)
+_FIVE = WIN_STONE_CNT * N_OPEN_KIND
+
+
 def heuristic_evaluate(state: GameState, player: int) -> float:
+    """
+    Same score as full_scan_evaluate, read from the pattern counts that
+    GameState keeps up to date on every apply_move. Memoized per process
+    in eval_cache when settings.EVAL_CACHE_CAPACITY is set.
+    """
+    if SEARCH_STATS:
+        metrics.heuristic_evals += 1
+    cache = eval_cache.cache
+    if cache is None:
+        return _evaluate(state, player)
+    key = (state.zobrist, player)
+    score = cache.get(key)
+    if score is None:
+        score = _evaluate(state, player)
+        cache.put(key, score)
+    return score
+
+
+def _evaluate(state: GameState, player: int) -> float:
+    counts = state.pattern_counts
+    mine = player * PATTERN_STRIDE
+    theirs = (1 - player) * PATTERN_STRIDE
+
+    # 즉시승/즉시패 (a position never holds fives of both colors)
+    if any(counts[mine + _FIVE : mine + PATTERN_STRIDE]):
+        return 1e9
+    if any(counts[theirs + _FIVE : theirs + PATTERN_STRIDE]):
+        return -1e9
+
+    my_score = CENTER_WEIGHT * state.center_sum[player]
+    opp_score = CENTER_WEIGHT * state.center_sum[1 - player]
+    for w_my, w_opp, c_my, c_opp in zip(
+        MY_PATTERN_WEIGHTS,
+        OPP_PATTERN_WEIGHTS,
+        counts[mine : mine + _FIVE],
+        counts[theirs : theirs + _FIVE],
+    ):
+        my_score += w_my * c_my
+        opp_score += w_opp * c_opp
+    return float(my_score - opp_score)
+
+
+# reference implementation: scans every cell and walks every line
+def full_scan_evaluate(state: GameState, player: int) -> float:
     my_score, opp_score = 0.0, 0.0
     center = BOARD_LENGTH // 2
     visited: list[int] = [0] * len(DIRS)
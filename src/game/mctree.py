@@ -1,82 +1,255 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
+from dataclasses import dataclass
 import math
 import random
 import time
 
 from constants import PLAYER_1, PLAYER_2
-from game.gamestate import GameState
+from game.gamestate import GameState, opponent
 from game.node import Node
 from settings import (
     BOARD_LENGTH,
     DEBUG_MODE,
     MAX_DEPTH,
     N_ROLLOUT,
+    ROLLOUT_BATCH_LEAVES,
+    ROLLOUT_POLICY,
     ROLLOUT_SAMPLE_SIZE,
+    SEARCH_STATS,
+    TT_CAPACITY,
 )
+from game.batch_heuristic import move_scores
+from game.bitset import idx
 from game.heuristic import heuristic_evaluate
+from game.pattern_rollout import batch_rollouts, pattern_rollout
+from game.transposition import TranspositionTable
+from src.game import eval_cache, metrics
+from src.game.search_stats import SearchStats
+from src.game.time_manager import SearchClock, top_two
 
 C = math.sqrt(2)  # exploration constant (tune if necessary)
 K_PB = 50  # bias-decay constant
 K_BLEND = 3
+VIRTUAL_LOSS = 1.0  # reward charged per pending evaluation (leaf parallel)
+# "heuristic": full-board move_scores per step, "pattern": local windows only,
+# "batch": the pattern policy with all playouts of a batch run in lockstep
+ROLLOUT_POLICIES = ("heuristic", "pattern", "batch")
 
+_NO_PHASE = nullcontext()  # phase timer stand-in when stats are off
 
+
+@dataclass(frozen=True, slots=True)
+class RolloutParams:
+    """Leaf evaluation settings of one tree (defaults from settings.py)"""
+
+    n_rollout: int = N_ROLLOUT
+    max_depth: int = MAX_DEPTH
+    sample_size: int = ROLLOUT_SAMPLE_SIZE
+    k_blend: float = K_BLEND
+    policy: str = ROLLOUT_POLICY
+    batch_leaves: int = ROLLOUT_BATCH_LEAVES  # "batch": leaves evaluated together
+
+    def __post_init__(self):
+        if self.policy not in ROLLOUT_POLICIES:
+            raise ValueError(f"unknown rollout policy: {self.policy}")
+
+
+# Rewards and priors of a node are seen from the player who made node.move,
+# i.e. opponent(node.state.current_player); backpropagate flips the sign per ply.
 class MCTree:
     root: Node
     time_limit: float
     n_iteration: int
     thread_safe: bool
+    table: TranspositionTable | None
+    stats: SearchStats | None  # of the current / last search
+    rollout_params: RolloutParams
 
     def __init__(
-        self, time_limit: float, n_iteration: int, *, thread_safe: bool = False
+        self,
+        time_limit: float,
+        n_iteration: int,
+        *,
+        thread_safe: bool = False,
+        tt_capacity: int = TT_CAPACITY,
+        rollout_params: RolloutParams = RolloutParams(),
     ):
         self.time_limit = time_limit
         self.n_iteration = n_iteration
         self.thread_safe = thread_safe
+        self.rollout_params = rollout_params
+        # shared statistics for transpositions, kept as long as the tree
+        self.table = (
+            TranspositionTable(tt_capacity, thread_safe=thread_safe)
+            if tt_capacity
+            else None
+        )
+        self.stats = None
+        self._stats_start: dict[str, int] = {}
+        self._stats_clock = 0.0
 
-    def run_single_thread(self, state: GameState) -> tuple[int, int]:
-        self.root = Node(state, thread_safe=self.thread_safe)
-        start = time.time()
+    def run_single_thread(
+        self, state: GameState, clock: SearchClock | None = None
+    ) -> tuple[int, int]:
+        """clock: when to stop (default: time_limit / n_iteration as is)"""
+        self.start_stats()
+        self.reset_root(state)
+        if clock is None:
+            clock = SearchClock(self.time_limit, self.n_iteration)
         i = 0
 
-        while i < self.n_iteration and time.time() - start < self.time_limit:
-            self.do_iteration()
-            i += 1
+        batch = self.rollout_params.batch_leaves
+        batched = self.rollout_params.policy == "batch" and batch > 1
+        while clock.stop_reason(i, self.top_two_visits) is None:
+            if batched:
+                i += self.do_batch_iteration(min(batch, clock.n_iteration - i))
+            else:
+                self.do_iteration()
+                i += 1
 
         if DEBUG_MODE:
             print(f"iteration 횟수: {i}")
+            if self.table is not None:
+                print(f"transposition table: {self.table.counters()}")
+            if eval_cache.cache is not None:
+                print(f"eval cache: {eval_cache.cache.counters()}")
 
         best_child = self.root.most_visited_child()
         assert best_child is not None
+        self.finish_stats()
         return best_child.move
 
+    def start_stats(self) -> None:
+        """Fresh SearchStats for the coming search (None when SEARCH_STATS is off)"""
+        if not SEARCH_STATS:
+            self.stats = None
+            return
+        self.stats = SearchStats()
+        self._stats_start = metrics.snapshot()
+        self._stats_clock = time.perf_counter()
+
+    def finish_stats(self) -> SearchStats | None:
+        """Close the current stats: wall time, counters, root visits"""
+        stats = self.stats
+        if stats is None:
+            return None
+        stats.elapsed = time.perf_counter() - self._stats_clock
+        stats.add_counts(metrics.since(self._stats_start))
+        for move, n in self._root_visits().items():
+            stats.root_visits[move] = stats.root_visits.get(move, 0) + n
+        return stats
+
+    def reset_root(self, state: GameState, max_depth: int = 2) -> Node:
+        """
+        Root the tree at state. If the previous search already reached this
+        position (our move then the opponent's reply), that subtree and its
+        statistics become the new root and the rest of the tree is dropped.
+        """
+        old_root: Node | None = getattr(self, "root", None)
+        node = old_root.find_descendant(state, max_depth) if old_root else None
+        if node is None:
+            # clone: the caller keeps playing on its own state object
+            self.root = Node(
+                state.clone(), thread_safe=self.thread_safe, table=self.table
+            )
+            return self.root
+
+        # cut the discarded part loose so it is freed without waiting for gc
+        ancestor = node.parent
+        node.parent = None
+        while ancestor is not None:
+            ancestor.children = []
+            ancestor = ancestor.parent
+        self.root = node
+        return node
+
     def do_iteration(self):
+        leaf, reward = self.select_leaf()
+        if reward is None:
+            reward = self.evaluate(leaf.state)
+        self.backpropagate(leaf, reward)
+
+    def do_batch_iteration(self, n_leaves: int) -> int:
+        """
+        Select up to n_leaves leaves, kept apart by virtual loss as in leaf
+        parallel, evaluate them in one evaluate_batch and back them up.
+        Returns the number of iterations done.
+        """
+        pending = []
+        for _ in range(n_leaves):
+            leaf, reward = self.select_leaf()
+            if reward is None:
+                self.add_virtual_loss(leaf)
+                pending.append(leaf)
+            else:
+                self.backpropagate(leaf, reward)
+        rewards = self.evaluate_batch([leaf.state for leaf in pending])
+        for leaf, reward in zip(pending, rewards):
+            self.revert_virtual_loss(leaf)
+            self.backpropagate(leaf, reward)
+        return n_leaves
+
+    def select_leaf(self) -> tuple[Node, float | None]:
+        """
+        Select, then expand one child. Returns the node to back up from and
+        its reward when already known (terminal or transposition), else None.
+        """
         selected, is_terminal = self.select(self.root)
         if is_terminal:
-            reward = self._terminal_value(selected.state)
-            self.backpropagate(selected, reward)
-        else:
-            expanded = selected.expand(top_k=5)
-            reward = self.blended_evaluation(
-                expanded.state, N_ROLLOUT, MAX_DEPTH, K_BLEND
-            )
-            self.backpropagate(expanded, reward)
+            return selected, self._terminal_value(selected.state)
+        with self._phase("expand"):
+            expanded = selected.expand(top_k=5, table=self.table)
+        if self.stats is not None:
+            self.stats.observe_depth(self._depth(expanded))
+        # transposition: reuse the evaluation of the shared position, without
+        # the virtual losses of evaluations still pending on it
+        return expanded, expanded.stats.settled_mean()
 
     def select(self, node: Node) -> tuple[Node, bool]:  # [selected Node, is_terminal]
-        while True:
-            if node.state.is_terminal:
-                return node, True
-            elif not node.is_fully_expanded():
-                return node, False
-            node = node.best_child(self._pb_ucb1)
+        with self._phase("select"):
+            while True:
+                if node.state.is_terminal:
+                    return node, True
+                elif not node.is_fully_expanded():
+                    return node, False
+                node = node.best_child(self._pb_ucb1)
+
+    def evaluate(self, state: GameState) -> float:
+        """blended_evaluation with this tree's rollout_params"""
+        p = self.rollout_params
+        return self.blended_evaluation(state, p.n_rollout, p.max_depth, p.k_blend)
+
+    def evaluate_batch(self, states: list[GameState]) -> list[float]:
+        """evaluate of every state; "batch" runs all their playouts at once"""
+        p = self.rollout_params
+        if p.policy != "batch" or not states:
+            return [self.evaluate(state) for state in states]
+        with self._phase("evaluate"):
+            with self._phase("rollout"):
+                values = batch_rollouts(
+                    [s for s in states for _ in range(p.n_rollout)],
+                    p.max_depth,
+                    p.sample_size,
+                )
+            rollout_vals = values.reshape(len(states), p.n_rollout).mean(axis=1)
+            return [
+                self._blend(float(v), s, p.n_rollout, p.k_blend)
+                for v, s in zip(rollout_vals, states)
+            ]
 
     # average of rollout + heuristic
     def blended_evaluation(
         self, state: GameState, n_rollout: int, max_depth: int, k: float
     ) -> float:
-        rollout_val = self.rollout_average(state, n_rollout, max_depth)
-        heuristic_val = heuristic_evaluate(state, state.current_player)
+        with self._phase("evaluate"):
+            rollout_val = self.rollout_average(state, n_rollout, max_depth)
+        return self._blend(rollout_val, state, n_rollout, k)
 
+    @staticmethod
+    def _blend(rollout_val: float, state: GameState, n_rollout: int, k: float) -> float:
+        heuristic_val = heuristic_evaluate(state, opponent(state.current_player))
         if abs(rollout_val) > 1e8:
             return rollout_val
         if abs(heuristic_val) > 1e8:
@@ -87,10 +260,25 @@ class MCTree:
 
     # To reduce stack frame, use iterative update and do not call a function
     def backpropagate(self, node: Node | None, reward: float):
+        if SEARCH_STATS:
+            metrics.iterations += 1
         cur_reward = reward
+        with self._phase("backpropagate"):
+            while node is not None:
+                node.update(cur_reward)
+                cur_reward = -cur_reward
+                node = node.parent
+
+    # A pending evaluation counts as a lost visit on its path, so the next
+    # selections spread to other leaves until the real result is backed up
+    def add_virtual_loss(self, node: Node | None):
+        while node is not None:
+            node.stats.add_virtual_loss(VIRTUAL_LOSS)
+            node = node.parent
+
+    def revert_virtual_loss(self, node: Node | None):
         while node is not None:
-            node.update(cur_reward)
-            cur_reward = -cur_reward
+            node.stats.revert_virtual_loss(VIRTUAL_LOSS)
             node = node.parent
 
     # internal -----------------------------------------------------------------
@@ -98,13 +286,24 @@ class MCTree:
     def rollout_average(
         self, state: GameState, n_rollout: int, max_depth: int
     ) -> float:
-        total = 0.0
-        for _ in range(n_rollout):
-            total += self.rollout(state, max_depth)
+        with self._phase("rollout"):
+            if self.rollout_params.policy == "batch":
+                sample_size = self.rollout_params.sample_size
+                values = batch_rollouts([state] * n_rollout, max_depth, sample_size)
+                return float(values.mean())
+            total = 0.0
+            for _ in range(n_rollout):
+                total += self.rollout(state, max_depth)
         return total / n_rollout
 
     def rollout(self, start: GameState, max_depth: int) -> float:
+        sample_size = self.rollout_params.sample_size
+        if self.rollout_params.policy == "pattern":
+            return pattern_rollout(start, max_depth, sample_size)
+        if self.rollout_params.policy == "batch":
+            return float(batch_rollouts([start], max_depth, sample_size)[0])
         state = start.clone()
+        mover = opponent(start.current_player)
         for step in range(max_depth):
             if state.is_terminal:
                 break
@@ -115,20 +314,12 @@ class MCTree:
 
             sample = (
                 moves
-                if len(moves) <= ROLLOUT_SAMPLE_SIZE
-                else random.sample(moves, ROLLOUT_SAMPLE_SIZE)
+                if len(moves) <= sample_size
+                else random.sample(moves, sample_size)
             )
 
-            best_move = None
-            best_score = -float("inf")
-            player = state.current_player
-            for mv in sample:
-                s = state.clone()
-                s.apply_move(mv)
-                sc = heuristic_evaluate(s, player)
-                if sc > best_score:
-                    best_score = sc
-                    best_move = mv
+            scores = move_scores(state, state.current_player)
+            best_move = max(sample, key=lambda mv: scores[idx(*mv)])
 
             state.apply_move(best_move)
             state.current_player = (
@@ -136,7 +327,34 @@ class MCTree:
             )
         # if DEBUG_MODE:
         #     state.print_board()
-        return heuristic_evaluate(state, state.current_player)
+        return heuristic_evaluate(state, mover)
+
+    def _phase(self, name: str):
+        return self.stats.phase(name) if self.stats is not None else _NO_PHASE
+
+    def _root_visits(self) -> dict[tuple[int, int], int]:
+        root: Node | None = getattr(self, "root", None)
+        if root is None:
+            return {}
+        return {
+            (int(child.move[0]), int(child.move[1])): child.n_visit
+            for child in root.children
+        }
+
+    def top_two_visits(self) -> list[int]:
+        return top_two(child.n_visit for child in self.root.children)
+
+    def root_child_stats(self) -> list[tuple[tuple[int, int], int, float]]:
+        """(move, visits, total reward) of every root child"""
+        return [(ch.move, ch.n_visit, ch.total_reward) for ch in self.root.children]
+
+    @staticmethod
+    def _depth(node: Node) -> int:
+        depth = 0
+        while node.parent is not None:
+            node = node.parent
+            depth += 1
+        return depth
 
     @staticmethod
     def _pb_ucb1(node: Node, k: float = K_PB, c: float = C):
@@ -170,4 +388,4 @@ class MCTree:
         winner = state.winner
         if winner == -1:
             return 0.0
-        return 1.0 if winner == state.current_player else -1.0
+        return 1.0 if winner == opponent(state.current_player) else -1.0
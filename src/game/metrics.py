@@ -0,0 +1,44 @@
+"""
+Process-wide search counters (plain module ints).
+
+Only counted when settings.SEARCH_STATS is on: every increment is behind
+that flag, so with stats off the hot paths pay nothing and the counts
+stay 0.
+
+Import it as `from src.game import metrics` everywhere: the engine is also
+importable as `game.*`, and one module object must hold the counts.
+Worker processes count on their own; their SearchStats carry the counts back.
+Increments from tree-parallel threads are not atomic, so counts there
+are approximate.
+"""
+
+from __future__ import annotations
+
+COUNTERS = (
+    "iterations",
+    "nodes_created",
+    "heuristic_evals",
+    "batch_scores",
+    "eval_hits",
+    "eval_misses",
+    "eval_evictions",
+)
+
+iterations = 0  # backed-up simulations
+nodes_created = 0  # tree nodes (Node objects or ArrayTree slots)
+heuristic_evals = 0  # heuristic_evaluate calls
+batch_scores = 0  # move_scores calls (one full board of move scores)
+eval_hits = 0  # heuristic_evaluate answered by eval_cache
+eval_misses = 0
+eval_evictions = 0
+
+
+def snapshot() -> dict[str, int]:
+    g = globals()
+    return {name: g[name] for name in COUNTERS}
+
+
+def since(before: dict[str, int]) -> dict[str, int]:
+    """Counts added after `before` (a snapshot)"""
+    now = snapshot()
+    return {name: now[name] - before.get(name, 0) for name in COUNTERS}
@@ -5,11 +5,17 @@ import random
 import threading
 from typing import Optional
 
+import numpy as np
 
 from constants import EPSILON
-from game.gamestate import GameState
+from game.gamestate import BOARD_N_BITS, GameState, opponent
+from src.game import metrics
+from src.game.batch_heuristic import move_scores
+from src.game.bitset import idx
+from src.game.symmetry import prune_symmetric
 from src.game.heuristic import heuristic_evaluate
-from src.settings import BOARD_LENGTH
+from src.game.transposition import NodeStats, TranspositionTable
+from src.settings import BOARD_LENGTH, SEARCH_STATS, SYMMETRY_PRUNING
 
 
 class Node:
@@ -18,9 +24,10 @@ class Node:
         "move",
         "parent",
         "children",
-        "total_reward",
-        "n_visit",
-        "heuristic",
+        "stats",
+        "_untried",
+        "_n_tried",
+        "_scores",
         "_lock",
     )
 
@@ -28,9 +35,7 @@ class Node:
     move: tuple[int, int]
     parent: "Node | None"
     children: list["Node"]
-    total_reward: float
-    n_visit: int
-    heuristic: float
+    stats: NodeStats
 
     def __init__(
         self,
@@ -39,52 +44,83 @@ class Node:
         parent: Optional[Node] = None,
         *,
         thread_safe: bool = False,
+        table: Optional[TranspositionTable] = None,
     ):
         if parent:
             self.move = move
         self.state = state
         self.parent = parent
         self.children: list[Node] = []
-        self.total_reward: float = 0.0
-        self.n_visit: int = 0
+        # candidate cells in heuristic order, built on the first expand;
+        # the first _n_tried of them already have a child
+        self._untried: Optional[np.ndarray] = None
+        self._n_tried = 0
+        # scores of the ranking pass, reused as the children's priors
+        self._scores: Optional[np.ndarray] = None
         self._lock = threading.Lock() if thread_safe else nullcontext()
-        self.heuristic = heuristic_evaluate(state, state.current_player)
+        if SEARCH_STATS:
+            metrics.nodes_created += 1
+
+        def new_stats() -> NodeStats:
+            return NodeStats(thread_safe=thread_safe)
+
+        if table is None:
+            self.stats = new_stats()
+        else:
+            self.stats = table.get_or_create(state.position_hash(), new_stats)
+
+    @property
+    def n_visit(self) -> int:
+        return self.stats.n_visit
+
+    @property
+    def total_reward(self) -> float:
+        return self.stats.total_reward
+
+    @property
+    def heuristic(self) -> float:
+        """Prior, evaluated on first use and cached in the shared stats"""
+        h = self.stats.heuristic
+        if h is None:
+            h = self.stats.heuristic = self._evaluate_prior()
+        return h
 
     def update(self, reward: float):
-        with self._lock:
-            self.n_visit += 1
-            self.total_reward += reward
+        self.stats.update(reward)
 
-    def expand(self, top_k: int = 3) -> "Node":
+    def expand(
+        self, top_k: int = 3, table: Optional[TranspositionTable] = None
+    ) -> "Node":
         """
         Create child node for untried move that has high heuristic score
         (Select random in Top k nodes)
         """
-        tried = {c.move for c in self.children}
-        untried = [
-            m for m in self.state.legal_moves(radius=BOARD_LENGTH) if m not in tried
-        ]
-        if not untried:
-            raise RuntimeError("expand on fully-expanded node")
-
-        # (1) Calculate heuristic score of each move
-        scored: list[tuple[float, tuple[int, int]]] = []
         player = self.state.current_player
-        for mv in untried:
-            s = self.state.clone()
-            s.apply_move(mv)
-            score = heuristic_evaluate(s, player)
-            scored.append((score, mv))
+        with self._lock:
+            # (1) Rank every legal move once, in one batch
+            if self._untried is None:
+                self._untried = self._rank_moves()
+            n_untried = len(self._untried) - self._n_tried
+            if not n_untried:
+                raise RuntimeError("expand on fully-expanded node")
 
-        # (2) Select random node in top k nodes (if k=1, best)
-        scored.sort(key=lambda x: x[0], reverse=True)
-        k = min(top_k, len(scored))
-        _, move = random.choice(scored[:k])
+            # (2) Select random node in top k untried (if k=1, best)
+            # swapping it to the front keeps the rest of the top k in place
+            head = self._n_tried
+            pick = head + random.randrange(min(top_k, n_untried))
+            order = self._untried
+            order[head], order[pick] = order[pick], order[head]
+            self._n_tried += 1
+            i = int(order[head])
+        move = (i % BOARD_LENGTH, i // BOARD_LENGTH)
 
         # (3) Create child node
         child_state = self.state.clone()
         child_state.apply_move(move)
-        child = Node(child_state, move, self, thread_safe=bool(self._lock))
+        child_state.current_player = opponent(player)
+        child = Node(
+            child_state, move, self, thread_safe=bool(self._lock), table=table
+        )
         with self._lock:
             self.children.append(child)
         return child
@@ -102,7 +138,40 @@ class Node:
         return random.choice(best_nodes)
 
     def is_fully_expanded(self) -> bool:
-        return len(self.children) == len(self.state.legal_moves(radius=BOARD_LENGTH))
+        return self._untried is not None and self._n_tried == len(self._untried)
+
+    # prior from the view of the player who made `move` (see MCTree)
+    def _evaluate_prior(self) -> float:
+        parent = self.parent
+        if parent is not None and parent._scores is not None:
+            x, y = self.move
+            return float(parent._scores[idx(x, y)])
+        return heuristic_evaluate(self.state, opponent(self.state.current_player))
+
+    def _rank_moves(self) -> np.ndarray:
+        """Empty cells by heuristic score, best first (ties in legal_moves order)"""
+        scores = self._scores = move_scores(self.state, self.state.current_player)
+        order = np.argsort(-scores, kind="stable")
+        n_legal = BOARD_N_BITS - self.state.occupy_bitset.bit_count()
+        order = order[:n_legal].astype(np.int16)
+        if SYMMETRY_PRUNING:
+            order = prune_symmetric(order, self.state)
+        return order
+
+    def find_descendant(self, state: GameState, max_depth: int) -> Optional[Node]:
+        """Node within max_depth moves below this one whose position equals state"""
+        frontier = [self]
+        for _ in range(max_depth + 1):
+            for node in frontier:
+                s = node.state
+                if (
+                    s.occupy_bitset == state.occupy_bitset
+                    and s.color_bitset == state.color_bitset
+                    and s.current_player == state.current_player
+                ):
+                    return node
+            frontier = [child for node in frontier for child in node.children]
+        return None
 
     def most_visited_child(self) -> Node:
         return max(self.children, key=lambda ch: ch.n_visit)
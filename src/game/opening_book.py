@@ -0,0 +1,93 @@
+"""
+Opening book: canonical position key -> move, read through a memory map.
+
+- Keys come from symmetry.canonical_hash, so one entry answers all 8
+  rotations / reflections of a position; the move is stored on the
+  canonical image and mapped back on lookup.
+- File: header (magic, version, entry count), then fixed-size records
+  sorted by key, found by binary search without loading the file.
+- Built offline by build_book.py.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import os
+import struct
+
+import numpy as np
+
+from game.gamestate import GameState
+from game.symmetry import INVERSE, canonical_hash, transform_move
+from settings import BOARD_LENGTH
+
+_MAGIC = b"GMKBOOK\x00"
+_VERSION = 1
+_HEADER = struct.Struct("<8sII")  # magic, version, n_entries
+ENTRY_DTYPE = np.dtype([("key", "<u8"), ("cell", "<u2"), ("weight", "<u2")])
+MAX_WEIGHT = np.iinfo(np.uint16).max
+
+
+class OpeningBook:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, n_entries = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"not an opening book (v{_VERSION}): {path}")
+        if n_entries:
+            self._entries = np.memmap(
+                path,
+                dtype=ENTRY_DTYPE,
+                mode="r",
+                offset=_HEADER.size,
+                shape=(n_entries,),
+            )
+        else:
+            self._entries = np.zeros(0, dtype=ENTRY_DTYPE)
+        self._keys = self._entries["key"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, state: GameState) -> tuple[int, int] | None:
+        """Book move for state on the real board, None if not in the book"""
+        if state.is_terminal or not len(self._entries):
+            return None
+        key, s = canonical_hash(state)
+        i = int(np.searchsorted(self._keys, np.uint64(key)))
+        if i == len(self._keys) or int(self._keys[i]) != key:
+            return None
+        cell = int(self._entries["cell"][i])
+        canonical_move = (cell % BOARD_LENGTH, cell // BOARD_LENGTH)
+        move = transform_move(canonical_move, INVERSE[s])
+        if (state.occupy_bitset >> (move[1] * BOARD_LENGTH + move[0])) & 1:
+            return None  # hash collision
+        return move
+
+    @staticmethod
+    def write(path: str, entries: dict[int, tuple[int, int]]) -> None:
+        """entries: canonical key -> (cell on the canonical image, weight)"""
+        records = np.zeros(len(entries), dtype=ENTRY_DTYPE)
+        for i, key in enumerate(sorted(entries)):
+            cell, weight = entries[key]
+            records[i] = (key, cell, min(weight, MAX_WEIGHT))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(records)))
+            f.write(records.tobytes())
+
+
+def book_entry(state: GameState, move: tuple[int, int]) -> tuple[int, int]:
+    """(key, cell on the canonical image) of playing move in state"""
+    key, s = canonical_hash(state)
+    x, y = transform_move(move, s)
+    return key, y * BOARD_LENGTH + x
+
+
+@lru_cache(maxsize=None)
+def load_book(path: str) -> OpeningBook | None:
+    """The book at path, shared per process; None when there is no file"""
+    if not os.path.exists(path):
+        return None
+    return OpeningBook(path)
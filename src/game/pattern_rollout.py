@@ -0,0 +1,261 @@
+"""
+"pattern" and "batch" rollout policies (RolloutParams.policy).
+
+Both play like the "heuristic" policy of MCTree.rollout: among the sampled
+candidates, the move with the best heuristic score after it. A candidate
+is scored only from the 5 cells on each side of it along the 4 lines,
+through batch_heuristic's pattern -> side code and score delta tables,
+instead of a full-board move_scores. The heuristic value of the position
+is carried along the same way, so a playout never touches a GameState.
+
+- pattern_rollout: one playout on a padded list of cell codes.
+- batch_rollouts: many playouts in lockstep on a (B, padded cells) array;
+  sampling, scoring and five checks are array operations over the batch.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+
+import numpy as np
+
+from constants import BLACK, DIRS, WHITE, WIN_STONE_CNT
+from game.batch_heuristic import (
+    AGAINST,
+    N_SIDE,
+    SIDE_OF_PATTERN,
+    board_planes,
+    delta_tables,
+)
+from game.gamestate import GameState, center_value, opponent
+from game.heuristic import (
+    CENTER_WEIGHT,
+    MY_PATTERN_WEIGHTS,
+    OPP_PATTERN_WEIGHTS,
+    heuristic_evaluate,
+)
+from settings import BOARD_LENGTH
+
+_PAD = WIN_STONE_CNT
+_W = BOARD_LENGTH + 2 * _PAD
+_EMPTY, _OFF = 0, 3
+_STONE = {BLACK: 1, WHITE: 2}  # cell code of each color
+
+_CELLS = tuple(
+    (y + _PAD) * _W + x + _PAD for y in range(BOARD_LENGTH) for x in range(BOARD_LENGTH)
+)
+# padded index -> (x, y) / center bonus of a stone there
+_MOVE = {p: (i % BOARD_LENGTH, i // BOARD_LENGTH) for i, p in enumerate(_CELLS)}
+_CENTER = {p: CENTER_WEIGHT * center_value(*_MOVE[p]) for p in _CELLS}
+# padded step of every direction
+_STEPS = tuple(dy * _W + dx for dx, dy in DIRS)
+# candidates of legal_moves(radius=3) around the last move
+_NEAR = tuple(dy * _W + dx for dy in range(-3, 4) for dx in range(-3, 4) if dx or dy)
+
+
+def _swap_colors(pid: int) -> int:
+    """Pattern id with the two stone codes exchanged"""
+    out = 0
+    for k in range(_PAD):
+        code = (pid >> (2 * k)) & 3
+        out |= (3 - code if code in (1, 2) else code) << (2 * k)
+    return out
+
+
+# pattern id of absolute codes -> side code relative to the player to move
+_SIDE = {
+    BLACK: SIDE_OF_PATTERN.tolist(),
+    WHITE: [int(SIDE_OF_PATTERN[_swap_colors(p)]) for p in range(4**_PAD)],
+}
+_OWN_DELTA, _WINS = delta_tables()
+# change of the opponent's heuristic when the player to move places a stone
+_OTHER_DELTA = -delta_tables(OPP_PATTERN_WEIGHTS, MY_PATTERN_WEIGHTS)[0]
+_LINES = tuple(
+    (step, int(AGAINST[d, 0]) * N_SIDE * N_SIDE) for d, step in enumerate(_STEPS)
+)
+# flat [against, left, right] tables; a line completing a five scores inf
+_OWN = np.where(_WINS, np.inf, _OWN_DELTA).ravel().tolist()
+_OTHER = _OTHER_DELTA.ravel().tolist()
+
+
+def _board(state: GameState) -> list[int]:
+    black, white = board_planes(state)
+    codes = np.full((_W, _W), _OFF, dtype=np.int64)
+    codes[_PAD:-_PAD, _PAD:-_PAD] = _STONE[BLACK] * black + _STONE[WHITE] * white
+    return codes.ravel().tolist()
+
+
+def _line_keys(board: list[int], p: int, side: list[int]) -> list[int]:
+    """Index into the flat delta tables for each line through p"""
+    keys = []
+    for s, base in _LINES:
+        left = (
+            board[p - s]
+            | board[p - 2 * s] << 2
+            | board[p - 3 * s] << 4
+            | board[p - 4 * s] << 6
+            | board[p - 5 * s] << 8
+        )
+        right = (
+            board[p + s]
+            | board[p + 2 * s] << 2
+            | board[p + 3 * s] << 4
+            | board[p + 4 * s] << 6
+            | board[p + 5 * s] << 8
+        )
+        keys.append(base + side[left] * N_SIDE + side[right])
+    return keys
+
+
+def pattern_rollout(start: GameState, max_depth: int, sample_size: int) -> float:
+    """heuristic_evaluate (mover's view) at the end of one playout from start"""
+    mover = opponent(start.current_player)
+    value = heuristic_evaluate(start, mover)
+    if start.is_terminal:
+        return value
+    board = _board(start)
+    player = start.current_player
+    last = None
+
+    for step in range(max_depth):
+        moves = []
+        if step >= 2 and last is not None:
+            moves = [last + o for o in _NEAR if board[last + o] == _EMPTY]
+        if not moves:
+            moves = [p for p in _CELLS if board[p] == _EMPTY]
+            if not moves:
+                break  # full board
+        if len(moves) > sample_size:
+            moves = random.sample(moves, sample_size)
+
+        side = _SIDE[player]
+        best, best_score, best_keys = -1, float("-inf"), []
+        for p in moves:
+            keys = _line_keys(board, p, side)
+            score = _CENTER[p] + sum(_OWN[k] for k in keys)
+            if score > best_score:
+                best, best_score, best_keys = p, score, keys
+                if score == math.inf:
+                    return 1e9 if player == mover else -1e9  # five
+        if player == mover:
+            value += best_score
+        else:
+            value += sum(_OTHER[k] for k in best_keys) - _CENTER[best]
+        board[best] = _STONE[player]
+        last = best
+        player = opponent(player)
+    return value
+
+
+# numpy forms of the tables above, for batch_rollouts
+_N_CELLS = _W * _W
+_CELLS_NP = np.array(_CELLS)
+_NEAR_NP = np.array(_NEAR)
+# [direction, left / right, k] -> offset of the k+1-th cell on that side
+_RAYS = np.array(
+    [[[sign * k * s for k in range(1, _PAD + 1)] for sign in (-1, 1)] for s in _STEPS]
+)
+_POW4 = 4 ** np.arange(_PAD)
+_SIDE_NP = np.zeros((2, 4**_PAD), dtype=np.int64)
+_SIDE_NP[BLACK], _SIDE_NP[WHITE] = _SIDE[BLACK], _SIDE[WHITE]
+_LINE_BASE = np.array([base for _, base in _LINES])
+_OWN_NP = np.array(_OWN)
+_OTHER_NP = np.array(_OTHER, dtype=np.float64)
+_CENTER_NP = np.zeros(_N_CELLS)
+_CENTER_NP[list(_CENTER)] = list(_CENTER.values())
+_CODE_NP = np.zeros(2, dtype=np.int8)
+_CODE_NP[BLACK], _CODE_NP[WHITE] = _STONE[BLACK], _STONE[WHITE]
+
+
+def batch_rollouts(
+    starts: list[GameState], max_depth: int, sample_size: int
+) -> np.ndarray:
+    """
+    pattern_rollout of every state in starts (repeat a state for several
+    playouts of it), all advanced one move per step; uses np.random.
+    """
+    n = len(starts)
+    boards = np.empty((n, _N_CELLS), dtype=np.int8)
+    player = np.empty(n, dtype=np.int64)
+    value = np.empty(n)
+    active = np.empty(n, dtype=bool)
+    first: dict[int, int] = {}  # id(state) -> row already holding its board
+    for row, state in enumerate(starts):
+        player[row] = state.current_player
+        value[row] = heuristic_evaluate(state, opponent(state.current_player))
+        active[row] = not state.is_terminal
+        seen = first.setdefault(id(state), row)
+        boards[row] = boards[seen] if seen != row else _board(state)
+    mover = 1 - player
+    last = np.zeros(n, dtype=np.int64)
+
+    for step in range(max_depth):
+        rows = np.flatnonzero(active)
+        if not len(rows):
+            break
+        cells, ok = _sample(boards, rows, last, step, sample_size)
+
+        # [row, candidate, direction] index into the flat delta tables
+        around = cells[:, :, None, None, None] + _RAYS
+        codes = boards[rows[:, None, None, None, None], around]
+        pid = (codes * _POW4).sum(axis=-1)
+        side = _SIDE_NP[player[rows][:, None, None, None], pid]
+        keys = _LINE_BASE + side[..., 0] * N_SIDE + side[..., 1]
+        scores = _OWN_NP[keys].sum(axis=-1) + _CENTER_NP[cells]
+        scores[~ok] = -np.inf
+
+        pick = scores.argmax(axis=1)
+        at = np.arange(len(rows))
+        best, best_score = cells[at, pick], scores[at, pick]
+        own_turn = player[rows] == mover[rows]
+
+        won = best_score == np.inf
+        value[rows[won]] = np.where(own_turn[won], 1e9, -1e9)
+        full = best_score == -np.inf  # no empty cell left
+        active[rows[won | full]] = False
+
+        go = ~(won | full)
+        rows, best, own_turn = rows[go], best[go], own_turn[go]
+        other = _OTHER_NP[keys[at[go], pick[go]]].sum(axis=-1) - _CENTER_NP[best]
+        value[rows] += np.where(own_turn, best_score[go], other)
+        boards[rows, best] = _CODE_NP[player[rows]]
+        last[rows] = best
+        player[rows] = 1 - player[rows]
+    return value
+
+
+def _sample(
+    boards: np.ndarray, rows: np.ndarray, last: np.ndarray, step: int, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (cells, ok) [row, k]: up to k random empty candidates of each row, as
+    legal_moves: radius 3 around the last move from the third step on, else
+    (or when none is empty there) every empty cell. ok marks real ones.
+    """
+    cells = np.empty((len(rows), k), dtype=np.int64)
+    ok = np.zeros((len(rows), k), dtype=bool)
+    wide = np.ones(len(rows), dtype=bool)
+    if step >= 2:
+        near = last[rows, None] + _NEAR_NP
+        valid = boards[rows[:, None], near] == _EMPTY
+        wide = ~valid.any(axis=1)
+        narrow = ~wide
+        cells[narrow], ok[narrow] = _pick(near[narrow], valid[narrow], k)
+    if wide.any():
+        pool = np.broadcast_to(_CELLS_NP, (int(wide.sum()), len(_CELLS_NP)))
+        valid = boards[rows[wide][:, None], pool] == _EMPTY
+        cells[wide], ok[wide] = _pick(pool, valid, k)
+    cells[~ok] = _CELLS[0]  # keeps the windows of unused slots on the board
+    return cells, ok
+
+
+def _pick(pool: np.ndarray, valid: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """k uniform picks without replacement among the valid cells of each row"""
+    width = pool.shape[1]
+    if k >= width:  # every cell is a candidate (padding marked not ok)
+        fill = ((0, 0), (0, k - width))
+        return np.pad(pool, fill), np.pad(valid, fill)
+    keys = np.where(valid, np.random.random(valid.shape), -1.0)
+    top = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(pool, top, 1), np.take_along_axis(valid, top, 1)
@@ -0,0 +1,98 @@
+"""
+Statistics of one search (one select_move), collected when
+settings.SEARCH_STATS is on.
+
+- phase_time: cumulative seconds per phase; "rollout" is part of
+  "evaluate". With worker processes the workers' times are added, so
+  phases can sum to more than the wall clock `elapsed`.
+- counts come from the metrics counters (iterations, nodes, heuristic calls,
+  eval_cache hits / misses / evictions).
+- root_visits: visits of every root move, summed over root-parallel workers.
+- decided_by: "search", "book", or the threats.ThreatMove reason when the
+  move was found without searching.
+- stop_reason: why the search stopped (time_manager.SearchClock).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import time
+
+from src.game import metrics
+
+PHASES = ("select", "expand", "evaluate", "rollout", "backpropagate")
+
+
+def _zero_phases() -> dict[str, float]:
+    return dict.fromkeys(PHASES, 0.0)
+
+
+@dataclass(slots=True)
+class SearchStats:
+    elapsed: float = 0.0
+    phase_time: dict[str, float] = field(default_factory=_zero_phases)
+    iterations: int = 0
+    nodes_created: int = 0
+    heuristic_evals: int = 0
+    batch_scores: int = 0
+    eval_hits: int = 0
+    eval_misses: int = 0
+    eval_evictions: int = 0
+    max_depth: int = 0
+    root_visits: dict[tuple[int, int], int] = field(default_factory=dict)
+    decided_by: str = "search"
+    stop_reason: str | None = None
+
+    def phase(self, name: str) -> _PhaseTimer:
+        return _PhaseTimer(self.phase_time, name)
+
+    def observe_depth(self, depth: int) -> None:
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def add_counts(self, counts: dict[str, int]) -> None:
+        for name in metrics.COUNTERS:
+            setattr(self, name, getattr(self, name) + counts.get(name, 0))
+
+    def merge(self, other: SearchStats) -> None:
+        """Add another process's (or thread's) stats of the same search"""
+        self.elapsed = max(self.elapsed, other.elapsed)
+        for name, t in other.phase_time.items():
+            self.phase_time[name] = self.phase_time.get(name, 0.0) + t
+        self.add_counts({name: getattr(other, name) for name in metrics.COUNTERS})
+        self.observe_depth(other.max_depth)
+        for move, n in other.root_visits.items():
+            self.root_visits[move] = self.root_visits.get(move, 0) + n
+
+    @property
+    def eval_hit_rate(self) -> float:
+        lookups = self.eval_hits + self.eval_misses
+        return self.eval_hits / lookups if lookups else 0.0
+
+    def top_moves(self, n: int = 5) -> list[tuple[tuple[int, int], int]]:
+        return sorted(self.root_visits.items(), key=lambda kv: -kv[1])[:n]
+
+    def summary(self) -> str:
+        if self.decided_by != "search":
+            return f"{self.decided_by} in {self.elapsed * 1000:.1f}ms"
+        phases = " ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.phase_time.items())
+        return (
+            f"{self.iterations} iter in {self.elapsed:.2f}s ({self.stop_reason}), "
+            f"{self.nodes_created} nodes, depth {self.max_depth}, "
+            f"{self.heuristic_evals} evals ({self.eval_hit_rate:.0%} cached) | "
+            f"{phases} | top {self.top_moves(3)}"
+        )
+
+
+class _PhaseTimer:
+    __slots__ = ("_times", "_name", "_start")
+
+    def __init__(self, times: dict[str, float], name: str):
+        self._times = times
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._times[self._name] += time.perf_counter() - self._start
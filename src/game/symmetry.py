@@ -0,0 +1,135 @@
+"""
+The 8 symmetries of the square board (rotations and reflections).
+
+- transform_move(move, s): image of a move (x, y) under symmetry s;
+  INVERSE[s] undoes s.
+- canonical_hash(state): the same key for all 8 images of a position, and
+  the symmetry that maps the position onto its canonical image.
+- prune_symmetric(cells, state): at a position that some symmetries map
+  onto itself, moves that are images of each other lead to equivalent
+  positions; keep the first of each class. The kept moves are real cells,
+  so nothing needs mapping back.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from game.gamestate import BOARD_N_BITS, GameState, position_hash_of
+from settings import BOARD_LENGTH
+
+_LAST = BOARD_LENGTH - 1
+
+# (x, y) -> image, index = symmetry id (0: identity)
+_TRANSFORMS = (
+    lambda x, y: (x, y),
+    lambda x, y: (_LAST - y, x),  # rotate 90
+    lambda x, y: (_LAST - x, _LAST - y),  # rotate 180
+    lambda x, y: (y, _LAST - x),  # rotate 270
+    lambda x, y: (_LAST - x, y),  # mirror left-right
+    lambda x, y: (x, _LAST - y),  # mirror top-bottom
+    lambda x, y: (y, x),  # main diagonal
+    lambda x, y: (_LAST - y, _LAST - x),  # anti-diagonal
+)
+N_SYMMETRIES = len(_TRANSFORMS)
+IDENTITY = 0
+
+
+def _cell_map(transform) -> tuple[int, ...]:
+    out = []
+    for i in range(BOARD_N_BITS):
+        x, y = transform(i % BOARD_LENGTH, i // BOARD_LENGTH)
+        out.append(y * BOARD_LENGTH + x)
+    return tuple(out)
+
+
+# CELL_MAPS[s][cell] = image cell index
+CELL_MAPS = tuple(_cell_map(t) for t in _TRANSFORMS)
+INVERSE = tuple(
+    next(
+        t
+        for t in range(N_SYMMETRIES)
+        if all(CELL_MAPS[t][j] == i for i, j in enumerate(CELL_MAPS[s]))
+    )
+    for s in range(N_SYMMETRIES)
+)
+
+
+def transform_move(move: tuple[int, int], s: int) -> tuple[int, int]:
+    return _TRANSFORMS[s](int(move[0]), int(move[1]))
+
+
+def transform_bitsets(
+    occupy_bitset: int, color_bitset: int, s: int
+) -> tuple[int, int]:
+    """(occupy, color) bitsets of the image of a position"""
+    if s == IDENTITY:
+        return occupy_bitset, color_bitset
+    cell_map = CELL_MAPS[s]
+    occupy = color = 0
+    bits = occupy_bitset
+    while bits:
+        low = bits & -bits
+        i = low.bit_length() - 1
+        j = 1 << cell_map[i]
+        occupy |= j
+        if (color_bitset >> i) & 1:
+            color |= j
+        bits ^= low
+    return occupy, color
+
+
+def canonical_hash(state: GameState) -> tuple[int, int]:
+    """
+    (key, s): key is the smallest position hash over the 8 images, s the
+    symmetry giving it. A move m of state is transform_move(m, s) on the
+    canonical image, and back with INVERSE[s].
+    """
+    best_key, best_s = -1, IDENTITY
+    for s in range(N_SYMMETRIES):
+        occupy, color = transform_bitsets(state.occupy_bitset, state.color_bitset, s)
+        key = position_hash_of(occupy, color, state.current_player)
+        if best_key < 0 or key < best_key:
+            best_key, best_s = key, s
+    return best_key, best_s
+
+
+def invariant_symmetries(state: GameState) -> tuple[int, ...]:
+    """Symmetries other than the identity that map state onto itself"""
+    return tuple(
+        s
+        for s in range(1, N_SYMMETRIES)
+        if _maps_onto_itself(state.occupy_bitset, state.color_bitset, CELL_MAPS[s])
+    )
+
+
+def prune_symmetric(cells: np.ndarray, state: GameState) -> np.ndarray:
+    """cells without those symmetric to an earlier one (order kept)"""
+    symmetries = invariant_symmetries(state)
+    if not symmetries:
+        return cells
+    maps = [CELL_MAPS[s] for s in symmetries]
+    covered: set[int] = set()
+    keep = []
+    for cell in cells.tolist():
+        if cell in covered:
+            continue
+        keep.append(cell)
+        covered.update(m[cell] for m in maps)
+    return np.array(keep, dtype=cells.dtype)
+
+
+def _maps_onto_itself(occupy_bitset: int, color_bitset: int, cell_map) -> bool:
+    # a bijection of the cells: every stone landing on a stone of its color
+    # is enough; stops at the first mismatch
+    bits = occupy_bitset
+    while bits:
+        low = bits & -bits
+        i = low.bit_length() - 1
+        j = cell_map[i]
+        if not (occupy_bitset >> j) & 1:
+            return False
+        if ((color_bitset >> i) ^ (color_bitset >> j)) & 1:
+            return False
+        bits ^= low
+    return True
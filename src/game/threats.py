@@ -0,0 +1,130 @@
+"""
+Threat-space search run before MCTS (Agent.select_move).
+
+Only fives and fours are considered, on padded bitboards (bitboard.py):
+1. a five for the side to move: play it                     -> "win"
+2. a five for the opponent: block it                        -> "block"
+3. a VCF (win by continuous fours) for the side to move     -> "vcf"
+4. a VCF for the opponent: if exactly one cell of its line
+   stops every VCF, play it                                 -> "defend"
+All of it shares one node budget; when the budget runs out there is no
+answer and MCTS decides as before.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from game.bitboard import BOARD_MASK, cell_of, completion_cells, iter_bits
+from game.gamestate import GameState, opponent
+
+Line = list[int]  # padded cells, attacker and defender alternating
+
+
+@dataclass(frozen=True, slots=True)
+class ThreatMove:
+    move: tuple[int, int]
+    reason: str  # "win" / "block" / "vcf" / "defend"
+    nodes: int  # search nodes spent
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+class _Budget:
+    __slots__ = ("left", "spent")
+
+    def __init__(self, nodes: int):
+        self.left = nodes
+        self.spent = 0
+
+    def spend(self) -> None:
+        if self.left <= 0:
+            raise _OutOfBudget
+        self.left -= 1
+        self.spent += 1
+
+
+def solve(state: GameState, node_budget: int) -> ThreatMove | None:
+    """Forced move of the side to move, or None (no forced move found)"""
+    if state.is_terminal:
+        return None
+    own, opp = _planes(state)
+    empty = BOARD_MASK & ~(own | opp)
+    budget = _Budget(node_budget)
+
+    def found(p: int, reason: str) -> ThreatMove:
+        return ThreatMove(cell_of(p), reason, budget.spent)
+
+    wins = completion_cells(own, empty, 1)
+    if wins:
+        return found(_lowest(wins), "win")
+    threats = completion_cells(opp, empty, 1)
+    if threats:
+        return found(_lowest(threats), "block")
+
+    try:
+        line = find_vcf(own, opp, budget)
+        if line is not None:
+            return found(line[0], "vcf")
+
+        # the opponent's VCF if we passed: try every cell of its line
+        their_line = find_vcf(opp, own, budget)
+        if their_line is None:
+            return None
+        defences = [
+            p
+            for p in dict.fromkeys(their_line)
+            if find_vcf(opp, own | (1 << p), budget) is None
+        ]
+    except _OutOfBudget:
+        return None
+    if len(defences) == 1:
+        return found(defences[0], "defend")
+    return None
+
+
+def find_vcf(own: int, opp: int, budget: _Budget) -> Line | None:
+    """VCF line of `own` (to move) against `opp`, None if there is none"""
+    return _vcf(own, opp, budget, set())
+
+
+def _vcf(
+    own: int, opp: int, budget: _Budget, failed: set[tuple[int, int]]
+) -> Line | None:
+    budget.spend()
+    empty = BOARD_MASK & ~(own | opp)
+    wins = completion_cells(own, empty, 1)
+    if wins:
+        return [_lowest(wins)]
+    threats = completion_cells(opp, empty, 1)
+    if threats & (threats - 1):
+        return None  # two fives to stop and no five of our own
+
+    fours = completion_cells(own, empty, 2)
+    if threats:
+        fours &= threats  # the four must also block
+    for p in iter_bits(fours):
+        attacked = own | (1 << p)
+        replies = completion_cells(attacked, empty & ~(1 << p), 1)
+        if replies & (replies - 1):
+            return [p]  # two fives at once: cannot be blocked
+        blocked = opp | replies
+        if (attacked, blocked) in failed:
+            continue
+        rest = _vcf(attacked, blocked, budget, failed)
+        if rest is not None:
+            return [p, _lowest(replies)] + rest
+        failed.add((attacked, blocked))
+    return None
+
+
+def _planes(state: GameState) -> tuple[int, int]:
+    """(side to move, opponent) padded bitboards"""
+    player = state.current_player
+    return state.stones[player], state.stones[opponent(player)]
+
+
+def _lowest(board: int) -> int:
+    return (board & -board).bit_length() - 1
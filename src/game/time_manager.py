@@ -0,0 +1,156 @@
+"""
+Per-move search budgets and the rule for stopping a search.
+
+- TimeManager (one per Agent, i.e. per game): without a time bank every
+  move gets time_limit; with one, a move gets its share of the bank left,
+  weighted by game phase (_PHASE_WEIGHTS), and its time is deducted after.
+- SearchClock (one per search) is checked between iterations and records
+  why the search stopped:
+    "iterations"  n_iteration reached
+    "decided"     the runner-up cannot catch the leader's visits before the
+                  hard limit, even at the current iteration rate
+    "time"        the soft budget is spent and the top two are not close
+    "max_time"    the budget was extended because the top two were close,
+                  and the hard limit is spent too
+"""
+
+from __future__ import annotations
+
+import heapq
+import time
+from typing import Callable, Iterable
+
+from settings import CLOSE_VISIT_RATIO, EARLY_STOP, TIME_BANK, TIME_EXTEND
+
+# (stones on the board below, weight of the move's share of the bank)
+_PHASE_WEIGHTS = ((6, 0.5), (40, 1.4))
+_LATE_WEIGHT = 1.0
+EXPECTED_PLIES = 70  # game length the bank is spread over
+MIN_MOVES_LEFT = 8  # never plan for fewer of our own moves than this
+MAX_BANK_SHARE = 0.25  # one move never takes more of the bank left
+MIN_BUDGET = 0.05  # seconds, even when the bank is (nearly) spent
+MIN_EXTEND_VISITS = 8  # below this the leader's lead is noise, not "close"
+
+
+def top_two(visits: Iterable[int]) -> list[int]:
+    """The (up to) two largest visit counts, largest first"""
+    return heapq.nlargest(2, visits)
+
+
+class SearchClock:
+    __slots__ = (
+        "soft",
+        "hard",
+        "n_iteration",
+        "early_stop",
+        "close_ratio",
+        "start",
+        "reason",
+    )
+
+    def __init__(
+        self,
+        soft: float,
+        n_iteration: int,
+        hard: float | None = None,
+        early_stop: bool = False,
+        close_ratio: float = CLOSE_VISIT_RATIO,
+    ):
+        # defaults: a fixed time_limit / n_iteration search as before
+        self.soft = soft
+        self.hard = soft if hard is None else max(hard, soft)
+        self.n_iteration = n_iteration
+        self.early_stop = early_stop
+        self.close_ratio = close_ratio
+        self.start = time.time()
+        self.reason: str | None = None
+
+    def elapsed(self) -> float:
+        return time.time() - self.start
+
+    def stop_reason(self, done: int, root_top: Callable[[], list[int]]) -> str | None:
+        """
+        Why the search should stop after `done` iterations, None to go on.
+        root_top: top_two of the root children's visits, only called when
+        early stopping or extension needs it. Once set, the reason sticks
+        (tree threads share one clock).
+        """
+        if self.reason is None:
+            self.reason = self._check(done, root_top)
+        return self.reason
+
+    def _check(self, done: int, root_top: Callable[[], list[int]]) -> str | None:
+        if done >= self.n_iteration:
+            return "iterations"
+        if not done:
+            return None  # at least one iteration, so the root has children
+        elapsed = self.elapsed()
+        if elapsed >= self.hard:
+            return "max_time" if self.hard > self.soft else "time"
+        if not self.early_stop and elapsed < self.soft:
+            return None
+        top = root_top()
+        if not top:
+            return "time" if elapsed >= self.soft else None
+        leader, second = top[0], (top[1] if len(top) > 1 else 0)
+        if self.early_stop and done:
+            rate = done / max(elapsed, 1e-9)
+            left = min(self.n_iteration - done, rate * (self.hard - elapsed))
+            if leader - second > left:
+                return "decided"
+        close = leader >= MIN_EXTEND_VISITS and second >= self.close_ratio * leader
+        if elapsed >= self.soft and not close:
+            return "time"
+        return None
+
+    def settle(self) -> str:
+        """Reason of a search whose loop did not record one (e.g. in workers)"""
+        if self.reason is None:
+            self.reason = "time" if self.elapsed() >= self.soft else "iterations"
+        return self.reason
+
+
+class TimeManager:
+    """Search budgets of one player's moves over a game"""
+
+    __slots__ = ("time_limit", "n_iteration", "bank_left", "extend", "early_stop")
+
+    def __init__(
+        self,
+        time_limit: float,
+        n_iteration: int,
+        time_bank: float | None = TIME_BANK,
+        extend: float = TIME_EXTEND,
+        early_stop: bool = EARLY_STOP,
+    ):
+        self.time_limit = time_limit
+        self.n_iteration = n_iteration
+        self.bank_left = time_bank  # seconds left for the game, None: no bank
+        self.extend = extend
+        self.early_stop = early_stop
+
+    def budget(self, n_stones: int) -> tuple[float, float]:
+        """(soft, hard) seconds for the next move"""
+        if self.bank_left is None:
+            return self.time_limit, self.time_limit * self.extend
+        bank = max(self.bank_left, 0.0)
+        moves_left = max(MIN_MOVES_LEFT, (EXPECTED_PLIES - n_stones) / 2)
+        cap = bank * MAX_BANK_SHARE
+        soft = max(min(bank / moves_left * _phase_weight(n_stones), cap), MIN_BUDGET)
+        return soft, max(min(soft * self.extend, cap), soft)
+
+    def start(self, n_stones: int) -> SearchClock:
+        soft, hard = self.budget(n_stones)
+        return SearchClock(soft, self.n_iteration, hard, self.early_stop)
+
+    def finish(self, clock: SearchClock) -> None:
+        clock.settle()
+        if self.bank_left is not None:
+            self.bank_left -= clock.elapsed()
+
+
+def _phase_weight(n_stones: int) -> float:
+    for below, weight in _PHASE_WEIGHTS:
+        if n_stones < below:
+            return weight
+    return _LATE_WEIGHT
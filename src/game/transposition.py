@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import nullcontext
+import threading
+from typing import Callable, Optional
+
+
+class NodeStats:
+    """Visit statistics and prior of one position, shared by all its nodes"""
+
+    __slots__ = (
+        "n_visit",
+        "total_reward",
+        "heuristic",
+        "n_pending",
+        "pending_loss",
+        "_lock",
+    )
+
+    n_visit: int
+    total_reward: float
+    heuristic: Optional[float]  # None until a node first needs its prior
+
+    def __init__(
+        self, heuristic: Optional[float] = None, *, thread_safe: bool = False
+    ):
+        self.n_visit = 0
+        self.total_reward = 0.0
+        self.heuristic = heuristic
+        # virtual losses included in n_visit / total_reward (leaf and batch)
+        self.n_pending = 0
+        self.pending_loss = 0.0
+        self._lock = threading.Lock() if thread_safe else nullcontext()
+
+    def update(self, reward: float):
+        with self._lock:
+            self.n_visit += 1
+            self.total_reward += reward
+
+    def add_virtual_loss(self, loss: float):
+        with self._lock:
+            self.n_visit += 1
+            self.total_reward -= loss
+            self.n_pending += 1
+            self.pending_loss += loss
+
+    def revert_virtual_loss(self, loss: float):
+        with self._lock:
+            self.n_visit -= 1
+            self.total_reward += loss
+            self.n_pending -= 1
+            self.pending_loss -= loss
+
+    def settled_mean(self) -> Optional[float]:
+        """Mean reward of the backed-up visits only, None if there are none"""
+        with self._lock:
+            n = self.n_visit - self.n_pending
+            if n <= 0:
+                return None
+            return (self.total_reward + self.pending_loss) / n
+
+
+class TranspositionTable:
+    """
+    position hash -> NodeStats, so the same stones reached in a different
+    order share visits and evaluations (nodes stay a tree, their statistics
+    form the graph).
+
+    - Bounded: at most `capacity` entries, least recently used evicted first.
+      Nodes already holding an evicted entry keep using it.
+    - hits / misses / evictions are counted for sizing the table.
+    """
+
+    def __init__(self, capacity: int, *, thread_safe: bool = False):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self._entries: OrderedDict[int, NodeStats] = OrderedDict()
+        self._lock = threading.Lock() if thread_safe else nullcontext()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_create(self, key: int, create: Callable[[], NodeStats]) -> NodeStats:
+        with self._lock:
+            stats = self._entries.get(key)
+            if stats is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return stats
+
+            self.misses += 1
+            stats = create()
+            self._entries[key] = stats
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return stats
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def counters(self) -> dict[str, float]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
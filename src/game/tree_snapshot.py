@@ -0,0 +1,246 @@
+"""
+Search tree snapshots: a flat binary file read through a memory map.
+
+- File: header (magic, version, node and queue counts, root position),
+  then one fixed-size NODE_DTYPE record per node and one QUEUE_DTYPE
+  record per ranked move, in ArrayTree's layout (array_tree.py). The root
+  is node 0; only its subtree is written, renumbered breadth first.
+- write_snapshot takes an MCTree (Node objects) or an ArrayMCTree.
+- TreeSnapshot maps the file and walks it in place (children, root visits,
+  principal variation) without building a Node.
+- ArrayMCTree.from_snapshot copies the records into its buffers in bulk
+  and the search goes on from there; several processes can start from
+  the same file (RootWorkerPool(snapshot=...)).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+import os
+import struct
+
+import numpy as np
+
+from game.gamestate import BOARD_N_BITS, GameState
+from settings import BOARD_LENGTH
+
+_MAGIC = b"GMKTREE\x00"
+_VERSION = 1
+_N_BYTES = (BOARD_N_BITS + 7) // 8
+# magic, version, n_nodes, n_queue, current_player, last move x / y,
+# then the occupy and color bitsets
+_HEADER = struct.Struct(f"<8sIIIbbb{_N_BYTES}s{_N_BYTES}s")
+NO_NODE = -1
+
+# one record per node; names and types of ArrayTree's buffers
+NODE_DTYPE = np.dtype(
+    [
+        ("n_visit", "<i4"),
+        ("total_reward", "<f8"),
+        ("prior", "<f8"),
+        ("move", "<i2"),  # cell index, -1 for the root
+        ("parent", "<i4"),
+        ("first_child", "<i4"),
+        ("next_sibling", "<i4"),
+        ("queue_start", "<i4"),  # -1 until ranked
+        ("queue_len", "<i2"),
+        ("n_tried", "<i2"),  # the first n_tried queue moves have a child
+    ]
+)
+# ranked moves of every expanded node, with their scores (the priors)
+QUEUE_DTYPE = np.dtype([("move", "<i2"), ("score", "<f8")])
+
+
+class TreeSnapshot:
+    """A snapshot file, memory-mapped read-only"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+        magic, version, n_nodes, n_queue, player, x, y, occupy, color = header
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"not a tree snapshot (v{_VERSION}): {path}")
+        if not n_nodes:
+            raise ValueError(f"empty tree snapshot: {path}")
+        self.root_state = GameState(
+            current_player=player,
+            color_bitset=int.from_bytes(color, "little"),
+            occupy_bitset=int.from_bytes(occupy, "little"),
+            last_move=(x, y),
+        )
+        self.nodes = np.memmap(
+            path, dtype=NODE_DTYPE, mode="r", offset=_HEADER.size, shape=(n_nodes,)
+        )
+        queue_offset = _HEADER.size + self.nodes.nbytes
+        if n_queue:
+            self.queue = np.memmap(
+                path,
+                dtype=QUEUE_DTYPE,
+                mode="r",
+                offset=queue_offset,
+                shape=(n_queue,),
+            )
+        else:
+            self.queue = np.zeros(0, dtype=QUEUE_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def children(self, i: int) -> list[int]:
+        first_child = self.nodes["first_child"]
+        next_sibling = self.nodes["next_sibling"]
+        out = []
+        c = int(first_child[i])
+        while c != NO_NODE:
+            out.append(c)
+            c = int(next_sibling[c])
+        return out
+
+    def root_visits(self) -> dict[tuple[int, int], int]:
+        n_visit, move = self.nodes["n_visit"], self.nodes["move"]
+        return {_cell_move(move[c]): int(n_visit[c]) for c in self.children(0)}
+
+    def principal_variation(self, max_len: int = 10) -> list[tuple[int, int]]:
+        """Most visited line from the root"""
+        n_visit, move = self.nodes["n_visit"], self.nodes["move"]
+        line, i = [], 0
+        while len(line) < max_len:
+            children = self.children(i)
+            if not children:
+                break
+            i = max(children, key=lambda c: n_visit[c])
+            line.append(_cell_move(move[i]))
+        return line
+
+
+def load_snapshot(path: str) -> TreeSnapshot | None:
+    """The snapshot at path, None when there is no file"""
+    if not os.path.exists(path):
+        return None
+    return TreeSnapshot(path)
+
+
+def write_snapshot(path: str, tree) -> int:
+    """
+    Write the subtree under tree's root (an MCTree or ArrayMCTree) to path.
+    Returns the number of nodes written.
+    """
+    if hasattr(tree, "nodes"):
+        state = tree.root_state
+        nodes, queue = subtree_records(tree.nodes, tree.root_index)
+    else:
+        state = tree.root.state
+        nodes, queue = _node_records(tree.root)
+    x, y = state.last_move
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        len(nodes),
+        len(queue),
+        state.current_player,
+        x,
+        y,
+        state.occupy_bitset.to_bytes(_N_BYTES, "little"),
+        state.color_bitset.to_bytes(_N_BYTES, "little"),
+    )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(nodes.tobytes())
+        f.write(queue.tobytes())
+    os.replace(tmp, path)  # a reader never sees half a file
+    return len(nodes)
+
+
+def subtree_records(tree, root: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Records of the ArrayTree nodes under root, renumbered breadth first
+    (also how ArrayTree.compact drops the rest of a tree)
+    """
+    order = _breadth_first(root, tree.children)
+    size = tree.size
+    src = {
+        name: np.frombuffer(getattr(tree, name), dtype=NODE_DTYPE[name])[:size]
+        for name in NODE_DTYPE.names
+    }
+    new_index = np.full(size + 1, NO_NODE, dtype=np.int64)  # [-1] stays NO_NODE
+    new_index[order] = np.arange(len(order))
+
+    nodes = np.zeros(len(order), dtype=NODE_DTYPE)
+    for name in ("n_visit", "total_reward", "prior", "move", "queue_len", "n_tried"):
+        nodes[name] = src[name][order]
+    for name in ("parent", "first_child", "next_sibling"):
+        nodes[name] = new_index[src[name][order]]
+    nodes["parent"][0] = NO_NODE
+    nodes["next_sibling"][0] = NO_NODE
+
+    # queues of the kept nodes, packed in node order
+    queue_moves = np.frombuffer(tree.queue_moves, dtype=np.int16)
+    queue_scores = np.frombuffer(tree.queue_scores, dtype=np.float64)
+    starts, lengths = src["queue_start"][order], nodes["queue_len"].astype(np.int64)
+    ranked = starts != NO_NODE
+    offsets = np.cumsum(lengths) - lengths
+    nodes["queue_start"] = np.where(ranked, offsets, NO_NODE)
+    picks = np.repeat(starts[ranked] - offsets[ranked], lengths[ranked])
+    picks += np.arange(len(picks))
+    queue = np.zeros(len(picks), dtype=QUEUE_DTYPE)
+    queue["move"], queue["score"] = queue_moves[picks], queue_scores[picks]
+    return nodes, queue
+
+
+# ------------------------------------------------------------------ #
+#                             helpers
+# ------------------------------------------------------------------ #
+
+
+def _node_records(root) -> tuple[np.ndarray, np.ndarray]:
+    """Records of a Node tree, breadth first"""
+    order = _breadth_first(root, lambda node: node.children)
+    index = {id(node): i for i, node in enumerate(order)}
+    nodes = np.zeros(len(order), dtype=NODE_DTYPE)
+    nodes["n_visit"] = [node.n_visit for node in order]
+    nodes["total_reward"] = [node.total_reward for node in order]
+    nodes["prior"] = [node.heuristic for node in order]
+    nodes["move"][1:] = [y * BOARD_LENGTH + x for x, y in (n.move for n in order[1:])]
+    nodes["move"][0] = NO_NODE
+    nodes["parent"][1:] = [index[id(node.parent)] for node in order[1:]]
+    nodes["parent"][0] = NO_NODE
+    nodes["first_child"] = NO_NODE
+    nodes["next_sibling"] = NO_NODE
+    nodes["queue_start"] = NO_NODE
+
+    moves, scores, n_queued = [], [], 0
+    for i, node in enumerate(order):
+        children = [index[id(child)] for child in node.children]
+        if children:
+            # ArrayTree links the newest child first
+            nodes["first_child"][i] = children[-1]
+            nodes["next_sibling"][children[1:]] = children[:-1]
+        untried = node._untried
+        if untried is not None:
+            nodes["queue_start"][i] = n_queued
+            nodes["queue_len"][i] = len(untried)
+            nodes["n_tried"][i] = node._n_tried
+            moves.append(untried)
+            scores.append(node._scores[untried])
+            n_queued += len(untried)
+    queue = np.zeros(n_queued, dtype=QUEUE_DTYPE)
+    if moves:
+        queue["move"], queue["score"] = np.concatenate(moves), np.concatenate(scores)
+    return nodes, queue
+
+
+def _breadth_first(root, children) -> list:
+    order, frontier = [], deque([root])
+    while frontier:
+        node = frontier.popleft()
+        order.append(node)
+        frontier.extend(children(node))
+    return order
+
+
+def _cell_move(cell: int) -> tuple[int, int]:
+    cell = int(cell)
+    return cell % BOARD_LENGTH, cell // BOARD_LENGTH
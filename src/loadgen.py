@@ -0,0 +1,200 @@
+"""
+Load generator for server.py: many concurrent games against the engine.
+
+    PYTHONPATH=src python -m loadgen --serve --games 32 --concurrency 16
+    PYTHONPATH=src python -m loadgen --port 8765 --games 100 --time 0.2
+
+- Each client plays whole games on its own connection: random legal moves
+  for the human side, within 2 cells of the stones already played.
+- --serve starts a server on the same event loop (engine processes as
+  given by the server options); otherwise an already running one is used.
+- Prints client-side p50/p99 move latency and moves/s, then the server's
+  own stats. "busy" replies are retried after --backoff seconds.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from server import add_server_args, percentile, serve
+from settings import BOARD_LENGTH
+
+
+class Client:
+    __slots__ = ("reader", "writer")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, **request) -> dict:
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return json.loads(line)
+
+
+class Totals:
+    __slots__ = ("latencies", "games", "busy", "errors")
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.games = 0
+        self.busy = 0
+        self.errors: list[str] = []
+
+
+def human_move(rng: random.Random, played: set[tuple[int, int]]) -> tuple[int, int]:
+    if not played:
+        return BOARD_LENGTH // 2, BOARD_LENGTH // 2
+    near = {
+        (x + dx, y + dy)
+        for x, y in played
+        for dx in range(-2, 3)
+        for dy in range(-2, 3)
+        if 0 <= x + dx < BOARD_LENGTH and 0 <= y + dy < BOARD_LENGTH
+    }
+    return rng.choice(sorted(near - played))
+
+
+async def play_games(
+    args: argparse.Namespace, games: asyncio.Queue, totals: Totals, seed: int
+) -> None:
+    rng = random.Random(seed)
+    client = Client(*await asyncio.open_connection(args.host, args.port))
+    try:
+        while not games.empty():
+            game_id = games.get_nowait()
+            await play_one(client, args, rng, game_id, totals)
+    finally:
+        client.writer.close()
+
+
+async def play_one(
+    client: Client,
+    args: argparse.Namespace,
+    rng: random.Random,
+    game_id: int,
+    totals: Totals,
+) -> None:
+    ai = "black" if game_id % 2 else "white"
+
+    async def timed(**request) -> dict:
+        while True:
+            start = time.perf_counter()
+            reply = await client.request(**request)
+            if reply.get("error") != "busy":
+                break
+            totals.busy += 1
+            await asyncio.sleep(args.backoff)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        if reply.get("move") is not None:
+            totals.latencies.append(time.perf_counter() - start)
+        return reply
+
+    played: set[tuple[int, int]] = set()
+    try:
+        reply = await timed(op="new", ai=ai, time=args.time)
+        session = reply["session"]
+        for _ in range(args.moves):
+            if reply["move"] is not None:
+                played.add(tuple(reply["move"]))
+            if reply["winner"] is not None:
+                break
+            move = human_move(rng, played)
+            played.add(move)
+            reply = await timed(op="play", session=session, move=list(move))
+        await timed(op="close", session=session)
+        totals.games += 1
+    except RuntimeError as e:
+        totals.errors.append(f"game {game_id}: {e}")
+
+
+async def run(args: argparse.Namespace) -> Totals:
+    server = None
+    if args.serve:
+        server = asyncio.create_task(
+            serve(args.host, args.port, args.workers, args.max_queue, args.max_time)
+        )
+        await _wait_for_port(args.host, args.port)
+
+    games: asyncio.Queue = asyncio.Queue()
+    for game_id in range(args.games):
+        games.put_nowait(game_id)
+    totals = Totals()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            play_games(args, games, totals, args.seed + i)
+            for i in range(args.concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    ms = [t * 1000 for t in totals.latencies]
+    print(
+        f"{totals.games} games, {len(ms)} engine moves in {elapsed:.1f}s "
+        f"({len(ms) / elapsed:.2f} moves/s), concurrency {args.concurrency}"
+    )
+    print(
+        f"client latency p50 {percentile(ms, 50) or 0:.0f}ms  "
+        f"p99 {percentile(ms, 99) or 0:.0f}ms  busy retries {totals.busy}"
+    )
+    for error in totals.errors:
+        print(f"error: {error}")
+
+    client = Client(*await asyncio.open_connection(args.host, args.port))
+    print(f"server: {await client.request(op='stats')}")
+    client.writer.close()
+    if server is not None:
+        server.cancel()
+        try:
+            await server
+        except asyncio.CancelledError:
+            pass
+    return totals
+
+
+async def _wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load generator for the server")
+    add_server_args(parser)
+    parser.add_argument(
+        "--serve", action="store_true", help="start a server in this process"
+    )
+    parser.add_argument("--games", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16, help="connections")
+    parser.add_argument(
+        "--moves", type=int, default=20, help="human moves per game at most"
+    )
+    parser.add_argument("--time", type=float, default=0.2, help="seconds per move")
+    parser.add_argument("--backoff", type=float, default=0.05, metavar="SECONDS")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
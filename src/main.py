@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import argparse
 import multiprocessing
+import os
 import sys
 import datetime
 
 from typing import Callable
 
-from settings import DEBUG_MODE
+from settings import DEBUG_MODE, PONDERING
 from constants import PLAYER_1, PLAYER_2
 from src.parallel.mode import ParallelMode
 
@@ -71,7 +72,8 @@ def play_game(
 
 def play_human_vs_ai(parallel_mode: ParallelMode, n_workers: int) -> None:
     play_game(
-        human_controller, make_ai_controller(PLAYER_2, parallel_mode, n_workers)
+        human_controller,
+        make_ai_controller(PLAYER_2, parallel_mode, n_workers, ponder=PONDERING),
     )
 
 
@@ -94,7 +96,8 @@ def parse_args() -> argparse.Namespace:
         type=str,
         choices=[mode.value for mode in ParallelMode],
         default=ParallelMode.NONE.value,
-        help="none (default), tree (tree parallel), root (root parallel)",
+        help="none (default), tree (tree parallel), root (root parallel), "
+        "leaf (leaf parallel over processes)",
     )
     parser.add_argument(
         "--workers",
@@ -139,6 +142,7 @@ if __name__ == "__main__":
 
         now = datetime.datetime.now()
         path = f"./data/profile_{now.strftime('%Y%m%d_%H%M%S')}.txt"
+        os.makedirs("./data", exist_ok=True)
         with open(path, "w") as f:
             prof = cProfile.Profile()
             prof.runcall(main)
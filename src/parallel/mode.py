@@ -5,3 +5,4 @@ class ParallelMode(str, Enum):
     NONE = "none"
     TREE = "tree"
     ROOT = "root"
+    LEAF = "leaf"
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from src.parallel.strategy_base import StrategyBase
 from src.game.gamestate import GameState
 from src.game.mctree import MCTree
@@ -6,15 +8,24 @@ from src.game.mctree import MCTree
 def parallel_mcts(
     state: GameState,
     strategy: StrategyBase,
+    tree: MCTree | None = None,
 ) -> tuple[int, int]:
     """
     Common pipeline:
-        1. Prepare the tree
+        1. Prepare the tree (or continue the given one)
         2. Perform parallel search using strategy.run()
         3. Determine the final move with strategy.best_move()
+        4. Close tree.stats, adding the strategy's worker-side stats
     """
-    tree = MCTree(strategy.time_limit, strategy.n_iteration)
+    if tree is None:
+        tree = MCTree(
+            strategy.time_limit, strategy.n_iteration, thread_safe=strategy.thread_safe
+        )
+    tree.start_stats()
     strategy.run(state, tree)
     move = strategy.best_move(tree)
     assert move is not None, "parallel_mcts: best_move returned None"
+    stats = tree.finish_stats()
+    if stats is not None:
+        strategy.add_stats(stats)
     return move
@@ -0,0 +1,145 @@
+"""
+Bounded process pool shared by many concurrent games (server.py).
+
+- One single-process executor per worker; a session (one game) is pinned
+  to the worker with the fewest sessions when it starts, so its Agent and
+  search tree stay in that process and carry over from move to move.
+- A worker keeps at most SESSIONS_PER_WORKER agents; the least recently
+  used one is dropped first and simply starts a new tree on its next move.
+- Tasks carry the position as ints, like worker_pool. Replies carry the
+  move and a few numbers of the search that found it.
+- select_move() is bounded: past max_queue moves waiting or running it raises
+  PoolBusy instead of queueing, so the server can push back on clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from src.game.agent import Agent
+from src.game.gamestate import GameState
+from src.game.opening_book import load_book
+from src.parallel.worker_pool import reseed_process
+from src.settings import N_ITERATION, OPENING_BOOK_PATH
+
+SESSIONS_PER_WORKER = 32  # agents (trees) kept per worker process
+
+# per worker process, set by _init_session_worker
+_worker: dict = {}
+
+
+class PoolBusy(Exception):
+    pass
+
+
+def _init_session_worker() -> None:
+    reseed_process()
+    _worker["agents"] = OrderedDict()
+    _worker["book"] = load_book(OPENING_BOOK_PATH)
+
+
+def _select_move(
+    session_id: str,
+    player_id: int,
+    time_limit: float,
+    current_player: int,
+    occupy_bitset: int,
+    color_bitset: int,
+    last_move: tuple[int, int],
+) -> tuple[tuple[int, int], dict]:
+    agents: OrderedDict[str, Agent] = _worker["agents"]
+    agent = agents.get(session_id)
+    if agent is None:
+        agent = Agent(player_id, time_limit, N_ITERATION, book=_worker["book"])
+        agents[session_id] = agent
+        while len(agents) > SESSIONS_PER_WORKER:
+            _, evicted = agents.popitem(last=False)
+            evicted.close()
+    agents.move_to_end(session_id)
+
+    state = GameState(
+        current_player=current_player,
+        color_bitset=color_bitset,
+        occupy_bitset=occupy_bitset,
+        last_move=last_move,
+    )
+    move = agent.select_move(state)
+    stats = agent.last_stats
+    info = {"pid": os.getpid()}
+    if stats is not None:
+        info.update(
+            engine_ms=round(stats.elapsed * 1000, 1),
+            iterations=stats.iterations,
+            decided_by=stats.decided_by,
+        )
+    return (int(move[0]), int(move[1])), info
+
+
+def _drop_session(session_id: str) -> None:
+    agent = _worker["agents"].pop(session_id, None)
+    if agent is not None:
+        agent.close()
+
+
+class SessionPool:
+    """Engine processes shared by the sessions of an asyncio server"""
+
+    def __init__(self, n_workers: int, max_queue: int):
+        self.max_queue = max_queue
+        self._executors = [
+            ProcessPoolExecutor(1, initializer=_init_session_worker)
+            for _ in range(n_workers)
+        ]
+        self._n_sessions = [0] * n_workers
+        self.pending = 0  # moves submitted and not answered yet
+
+    @property
+    def n_workers(self) -> int:
+        return len(self._executors)
+
+    @property
+    def full(self) -> bool:
+        return self.pending >= self.max_queue
+
+    def open(self) -> int:
+        """Worker for a new session"""
+        worker = min(range(self.n_workers), key=self._n_sessions.__getitem__)
+        self._n_sessions[worker] += 1
+        return worker
+
+    async def select_move(
+        self,
+        worker: int,
+        session_id: str,
+        player_id: int,
+        time_limit: float,
+        state: GameState,
+    ) -> tuple[tuple[int, int], dict]:
+        if self.full:
+            raise PoolBusy
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executors[worker],
+                _select_move,
+                session_id,
+                player_id,
+                time_limit,
+                state.current_player,
+                state.occupy_bitset,
+                state.color_bitset,
+                state.last_move,
+            )
+        finally:
+            self.pending -= 1
+
+    def close_session(self, worker: int, session_id: str) -> None:
+        self._n_sessions[worker] -= 1
+        self._executors[worker].submit(_drop_session, session_id)
+
+    def close(self) -> None:
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
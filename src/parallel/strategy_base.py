@@ -3,14 +3,20 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Tuple
 
+from src.game.time_manager import SearchClock
+
 if TYPE_CHECKING:
     from game.gamestate import GameState
     from game.mctree import MCTree
+    from game.search_stats import SearchStats
 
 
 class StrategyBase(ABC):
     time_limit: float
     n_iteration: int
+    thread_safe: bool
+    # when to stop (Agent's TimeManager); None: time_limit / n_iteration
+    clock: SearchClock | None = None
 
     @abstractmethod
     def run(self, state: "GameState", tree: "MCTree") -> None:
@@ -19,3 +25,12 @@ class StrategyBase(ABC):
     @abstractmethod
     def best_move(self, tree: "MCTree") -> Tuple[int, int]:
         pass
+
+    def search_clock(self) -> SearchClock:
+        """The given clock, or a fixed one starting now"""
+        if self.clock is not None:
+            return self.clock
+        return SearchClock(self.time_limit, self.n_iteration)
+
+    def add_stats(self, stats: "SearchStats") -> None:
+        """Add what happened outside `tree` (e.g. in worker processes)"""
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from multiprocessing.pool import AsyncResult
+
+from src.game.gamestate import GameState
+from src.game.mctree import MCTree
+from src.game.node import Node
+from src.game.search_stats import SearchStats
+from src.game.time_manager import SearchClock
+from .strategy_base import StrategyBase
+from .worker_pool import LeafWorkerPool
+
+
+class StrategyLeaf(StrategyBase):
+    """
+    Leaf parallelization over processes: selection, expansion and
+    backpropagation stay in this process on one tree, while the
+    blended_evaluation of new leaves runs in a process pool.
+    Up to max_pending leaves are in flight (held back by virtual loss);
+    each is backed up as soon as its result arrives.
+    """
+
+    def __init__(
+        self,
+        n_workers: int,
+        n_iteration: int,
+        time_limit: float,
+        thread_safe: bool = False,
+        pool: LeafWorkerPool | None = None,
+        max_pending: int | None = None,
+        clock: SearchClock | None = None,
+    ):
+        self.n_workers = n_workers
+        self.n_iteration = n_iteration
+        self.time_limit = time_limit
+        self.thread_safe = thread_safe
+        # shared warm pool (e.g. owned by Agent); a temporary one otherwise
+        self.pool = pool
+        self.max_pending = max_pending or 2 * n_workers
+        self.clock = clock
+        self._worker_stats: SearchStats | None = None
+
+    def run(self, state: GameState, tree: MCTree):
+        if self.pool is not None:
+            self._search(state, tree, self.pool)
+            return
+        with LeafWorkerPool(self.n_workers) as pool:
+            self._search(state, tree, pool)
+
+    def best_move(self, tree: MCTree) -> tuple[int, int]:
+        return tree.root.most_visited_child().move
+
+    def add_stats(self, stats: SearchStats) -> None:
+        if self._worker_stats is not None:
+            stats.merge(self._worker_stats)
+
+    def _search(self, state: GameState, tree: MCTree, pool: LeafWorkerPool):
+        tree.reset_root(state)
+        pool.reset_stats()
+        pending: list[tuple[Node, AsyncResult]] = []
+        clock = self.search_clock()
+        n_done = 0
+
+        while True:
+            # issue new leaves while there is budget
+            while (
+                len(pending) < self.max_pending
+                and clock.stop_reason(n_done + len(pending), tree.top_two_visits)
+                is None
+            ):
+                leaf, reward = tree.select_leaf()
+                if reward is None:
+                    tree.add_virtual_loss(leaf)
+                    pending.append(
+                        (leaf, pool.submit(leaf.state, tree.rollout_params))
+                    )
+                else:
+                    tree.backpropagate(leaf, reward)
+                    n_done += 1
+            if not pending:
+                break
+
+            # back up every finished evaluation (wait for the oldest if none)
+            if not any(result.ready() for _, result in pending):
+                pending[0][1].wait()
+            still_pending = []
+            for leaf, result in pending:
+                if not result.ready():
+                    still_pending.append((leaf, result))
+                    continue
+                tree.revert_virtual_loss(leaf)
+                tree.backpropagate(leaf, pool.collect(result))
+                n_done += 1
+            pending = still_pending
+
+        self._worker_stats = pool.worker_stats
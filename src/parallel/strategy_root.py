@@ -1,39 +1,59 @@
-import multiprocessing as mp
+from __future__ import annotations
+
+import numpy as np
 
 from src.game.gamestate import GameState
 from src.game.mctree import MCTree
+from src.game.search_stats import SearchStats
+from src.game.time_manager import SearchClock
+from src.settings import BOARD_LENGTH
 from .strategy_base import StrategyBase
+from .worker_pool import RootWorkerPool
 
 
 class StrategyRoot(StrategyBase):
-    def __init__(self, n_workers: int, n_iteration: int, time_limit: float):
+    def __init__(
+        self,
+        n_workers: int,
+        n_iteration: int,
+        time_limit: float,
+        thread_safe: bool = True,
+        pool: RootWorkerPool | None = None,
+        clock: SearchClock | None = None,
+    ):
         self.n_workers = n_workers
         self.n_iteration = n_iteration
         self.time_limit = time_limit
-        self._cum: dict[tuple[int, int], tuple[int, float]] = {}
-
-    @staticmethod
-    def _worker(state: GameState, n_iter: int, t_lim: float):
-        tree = MCTree(t_lim, n_iter)
-        tree.run_single_thread(state)
-        return {
-            child.move: (child.n_visit, child.total_reward)
-            for child in tree.root.children
-            if child.move is not None
-        }
+        self.thread_safe = thread_safe
+        # shared warm pool (e.g. owned by Agent); a temporary one otherwise
+        self.pool = pool
+        # the workers cannot stop early: they get the clock's soft budget
+        self.clock = clock
+        self._visits: np.ndarray | None = None
+        self._rewards: np.ndarray | None = None
+        self._worker_stats: SearchStats | None = None
 
     def run(self, state: GameState, tree: MCTree):  # tree 인자를 쓰지 않음
-        args = [
-            (state.clone(), self.n_iteration, self.time_limit)
-            for _ in range(self.n_workers)
-        ]
-        with mp.Pool(self.n_workers) as pool:
-            results = pool.starmap(self._worker, args)
-
-        for result in results:
-            for move, (v, r) in result.items():
-                prev_v, prev_r = self._cum.get(move, (0, 0.0))
-                self._cum[move] = (prev_v + v, prev_r + r)
+        time_limit = self.search_clock().soft
+        if self.pool is not None:
+            self._visits, self._rewards = self.pool.search(
+                state, self.n_iteration, time_limit, tree.rollout_params
+            )
+            self._worker_stats = self.pool.worker_stats
+            return
+        with RootWorkerPool(self.n_workers) as pool:
+            self._visits, self._rewards = pool.search(
+                state, self.n_iteration, time_limit, tree.rollout_params
+            )
+            self._worker_stats = pool.worker_stats
 
     def best_move(self, _: MCTree) -> tuple[int, int]:
-        return max(self._cum.items(), key=lambda item: item[1][0])[0]
+        assert self._visits is not None, "best_move before run"
+        # ties (common with few visits per move) go to the higher reward,
+        # not to the lowest cell index
+        i = int(np.lexsort((self._rewards, self._visits))[-1])
+        return i % BOARD_LENGTH, i // BOARD_LENGTH
+
+    def add_stats(self, stats: SearchStats) -> None:
+        if self._worker_stats is not None:
+            stats.merge(self._worker_stats)
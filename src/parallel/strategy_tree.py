@@ -1,31 +1,43 @@
 from concurrent.futures import ThreadPoolExecutor
-import time
 
+from src.game import eval_cache
 from src.game.gamestate import GameState
 from src.game.mctree import MCTree
-from src.game.node import Node
+from src.game.time_manager import SearchClock
 from .strategy_base import StrategyBase
 
 
 class StrategyTree(StrategyBase):
-    def __init__(self, n_workers: int, n_iteration: int, time_limit: float):
+    def __init__(
+        self,
+        n_workers: int,
+        n_iteration: int,
+        time_limit: float,
+        thread_safe: bool = True,
+        clock: SearchClock | None = None,
+    ):
         self.n_workers = n_workers
         self.n_iteration = n_iteration
         self.time_limit = time_limit
+        self.thread_safe = thread_safe
+        self.clock = clock
 
     def run(self, state: GameState, tree: MCTree):
-        tree.root = Node(state)
-        start = time.time()
+        tree.reset_root(state)
+        clock = self.search_clock()
+        # a reused (e.g. pondered) root already has visits of its own
+        base_visit = tree.root.n_visit
 
         def worker():
             while (
-                tree.root.n_visit < self.n_iteration
-                and time.time() - start < self.time_limit
+                clock.stop_reason(tree.root.n_visit - base_visit, tree.top_two_visits)
+                is None
             ):
                 tree.do_iteration()
 
-        with ThreadPoolExecutor(self.n_workers) as pool:
-            list(pool.submit(worker) for _ in range(self.n_workers))
+        with eval_cache.shared_by_threads():
+            with ThreadPoolExecutor(self.n_workers) as pool:
+                list(pool.submit(worker) for _ in range(self.n_workers))
 
     def best_move(self, tree: MCTree) -> tuple[int, int]:
         move = tree.root.most_visited_child().move
@@ -0,0 +1,270 @@
+"""
+Long-lived process pools for root and leaf parallelization.
+
+- Workers import the engine and build its tables once, then stay warm for
+  every move of every game played through the pool.
+- A task carries only the position as ints (player, bitboards, last move)
+  and the tree's RolloutParams.
+- Each worker keeps its own MCTree between tasks, so its subtree is reused
+  like Agent's (MCTree.reset_root). With a snapshot file every root worker
+  starts from that tree instead (ArrayMCTree.from_snapshot); as with
+  reused subtrees, its visits are not reported, so they are not summed
+  once per worker.
+- Root: results come back through shared memory, one row of per-cell
+  visits and rewards of the root children per task slot, counting only
+  the iterations of that task.
+- Leaf: workers only run blended_evaluation for positions the main process
+  sends, results come back asynchronously as floats.
+- Both pools merge the SearchStats their workers send back into
+  `worker_stats` (None when settings.SEARCH_STATS is off): per search for
+  root, until `reset_stats()` for leaf.
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import os
+import random
+import time
+import weakref
+
+import numpy as np
+
+from src.game.array_tree import ArrayMCTree
+from src.game.bitset import idx
+from src.game.gamestate import BOARD_N_BITS, GameState
+from src.game.mctree import MCTree, RolloutParams
+from src.game.search_stats import SearchStats
+from src.game.tree_snapshot import load_snapshot
+
+# per worker process, set by _init_worker
+_worker: dict = {}
+
+
+def _result_views(buf, n_slots: int) -> tuple[np.ndarray, np.ndarray]:
+    visits = np.ndarray((n_slots, BOARD_N_BITS), dtype=np.int64, buffer=buf)
+    rewards = np.ndarray(
+        (n_slots, BOARD_N_BITS), dtype=np.float64, buffer=buf, offset=visits.nbytes
+    )
+    return visits, rewards
+
+
+def reseed_process() -> None:
+    """Own random streams for a worker (forked ones inherit the parent's)"""
+    seed = os.getpid() ^ time.time_ns()
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+
+
+def _init_worker(shm_name: str, n_slots: int, snapshot: str | None) -> None:
+    reseed_process()
+    shm = SharedMemory(name=shm_name)
+    _worker["shm"] = shm
+    _worker["visits"], _worker["rewards"] = _result_views(shm.buf, n_slots)
+    _worker["tree"] = None
+    if snapshot is not None:
+        saved = load_snapshot(snapshot)
+        if saved is not None:
+            _worker["tree"] = ArrayMCTree.from_snapshot(saved, 0, 0)
+
+
+def _search(
+    slot: int,
+    current_player: int,
+    occupy_bitset: int,
+    color_bitset: int,
+    last_move: tuple[int, int],
+    n_iteration: int,
+    time_limit: float,
+    rollout_params: RolloutParams,
+) -> tuple[int, SearchStats | None]:
+    state = GameState(
+        current_player=current_player,
+        color_bitset=color_bitset,
+        occupy_bitset=occupy_bitset,
+        last_move=last_move,
+    )
+    tree: MCTree | ArrayMCTree | None = _worker["tree"]
+    if tree is None:
+        tree = _worker["tree"] = MCTree(time_limit, n_iteration)
+    tree.time_limit = time_limit
+    tree.n_iteration = n_iteration
+    tree.rollout_params = rollout_params
+    # the kept subtree already has visits (earlier moves, a snapshot): only
+    # what this task adds is reported
+    tree.reset_root(state)
+    before = {move: (n, r) for move, n, r in tree.root_child_stats()}
+    tree.run_single_thread(state)
+
+    visits, rewards = _worker["visits"][slot], _worker["rewards"][slot]
+    visits[:] = 0
+    rewards[:] = 0.0
+    added: dict[tuple[int, int], int] = {}
+    for move, n_visit, total_reward in tree.root_child_stats():
+        n_before, reward_before = before.get(move, (0, 0.0))
+        i = idx(*move)
+        visits[i] = added[move] = n_visit - n_before
+        rewards[i] = total_reward - reward_before
+    stats = tree.stats
+    if stats is not None:
+        stats.root_visits = added  # not the kept subtree's totals
+    return slot, stats
+
+
+def _merged(total: SearchStats | None, stats: SearchStats | None):
+    if stats is None:
+        return total
+    if total is None:
+        return stats
+    total.merge(stats)
+    return total
+
+
+def _release(pool: mp.pool.Pool, shm: SharedMemory) -> None:
+    pool.terminate()
+    pool.join()
+    shm.close()
+    shm.unlink()
+
+
+class RootWorkerPool:
+    """
+    Process pool + shared result buffer reused across moves and games.
+    Close it (or use it as a context manager) when done; it is also
+    released when garbage collected or at interpreter exit.
+    """
+
+    def __init__(self, n_workers: int, snapshot: str | None = None):
+        """snapshot: tree snapshot file every worker starts from, if it exists"""
+        self.n_workers = n_workers
+        self._shm = SharedMemory(create=True, size=n_workers * BOARD_N_BITS * 16)
+        self._pool = mp.Pool(
+            n_workers,
+            initializer=_init_worker,
+            initargs=(self._shm.name, n_workers, snapshot),
+        )
+        self._finalizer = weakref.finalize(self, _release, self._pool, self._shm)
+        self.worker_stats: SearchStats | None = None  # of the last search
+
+    def search(
+        self,
+        state: GameState,
+        n_iteration: int,
+        time_limit: float,
+        rollout_params: RolloutParams = RolloutParams(),
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Run one search per worker; (visits, rewards) of root moves summed by cell"""
+        args = [
+            (
+                slot,
+                state.current_player,
+                state.occupy_bitset,
+                state.color_bitset,
+                state.last_move,
+                n_iteration,
+                time_limit,
+                rollout_params,
+            )
+            for slot in range(self.n_workers)
+        ]
+        self.worker_stats = None
+        for _, stats in self._pool.starmap(_search, args, chunksize=1):
+            self.worker_stats = _merged(self.worker_stats, stats)
+        # views are not kept: the buffer cannot be closed while exported
+        visits, rewards = _result_views(self._shm.buf, self.n_workers)
+        total = visits.sum(axis=0), rewards.sum(axis=0)
+        del visits, rewards
+        return total
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def __enter__(self) -> RootWorkerPool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# --------------------------------------------------------------------- #
+#                        leaf parallelization                           #
+# --------------------------------------------------------------------- #
+
+
+def _init_leaf_worker() -> None:
+    reseed_process()
+    _worker["tree"] = MCTree(0, 0, tt_capacity=0)
+
+
+def _evaluate_leaf(
+    current_player: int,
+    occupy_bitset: int,
+    color_bitset: int,
+    last_move: tuple[int, int],
+    is_terminal: bool,
+    winner: int,
+    rollout_params: RolloutParams,
+) -> tuple[float, SearchStats | None]:
+    state = GameState(
+        current_player=current_player,
+        color_bitset=color_bitset,
+        occupy_bitset=occupy_bitset,
+        last_move=last_move,
+        is_terminal=is_terminal,
+        winner=winner,
+    )
+    tree: MCTree = _worker["tree"]
+    tree.rollout_params = rollout_params
+    tree.start_stats()
+    reward = tree.evaluate(state)
+    return reward, tree.finish_stats()
+
+
+class LeafWorkerPool:
+    """Process pool evaluating leaves for one shared tree in the main process"""
+
+    def __init__(self, n_workers: int):
+        self.n_workers = n_workers
+        self._pool = mp.Pool(n_workers, initializer=_init_leaf_worker)
+        self._finalizer = weakref.finalize(self, _terminate, self._pool)
+        self.worker_stats: SearchStats | None = None
+
+    def submit(
+        self, state: GameState, rollout_params: RolloutParams = RolloutParams()
+    ) -> mp.pool.AsyncResult:
+        return self._pool.apply_async(
+            _evaluate_leaf,
+            (
+                state.current_player,
+                state.occupy_bitset,
+                state.color_bitset,
+                state.last_move,
+                state.is_terminal,
+                state.winner,
+                rollout_params,
+            ),
+        )
+
+    def collect(self, result: mp.pool.AsyncResult) -> float:
+        """Reward of a finished submit(), merging the worker's stats"""
+        reward, stats = result.get()
+        self.worker_stats = _merged(self.worker_stats, stats)
+        return reward
+
+    def reset_stats(self) -> None:
+        self.worker_stats = None
+
+    def close(self) -> None:
+        self._finalizer()
+
+    def __enter__(self) -> LeafWorkerPool:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _terminate(pool: mp.pool.Pool) -> None:
+    pool.terminate()
+    pool.join()
@@ -0,0 +1,306 @@
+"""
+Move server for many concurrent human-vs-AI games.
+
+    PYTHONPATH=src python -m server --port 8765 --workers 4
+
+Line-delimited JSON over TCP, one request per line, one reply per request
+in order. A session is one game owned by its connection and closed with it.
+    {"op": "new", "ai": "white", "time": 0.5}
+        -> {"ok": true, "session": "s1", "move": null, "winner": null}
+        (when the AI plays black, "move" is its first move)
+    {"op": "play", "session": "s1", "move": [7, 7]}
+        -> {"ok": true, "move": [8, 8], "winner": null, "ms": 512.3, ...}
+        winner: null while the game goes on, then "black" / "white" / "draw"
+    {"op": "close", "session": "s1"}
+    {"op": "stats"}  latency p50/p99, throughput, queue, sessions
+Errors: {"ok": false, "error": "..."}. "busy" means the engine queue is
+full (SessionPool.max_queue): nothing was played, retry the request later.
+A request's "id", if any, is echoed back.
+
+- Moves are searched in a shared SessionPool; each session keeps its tree
+  in its own worker between moves.
+- A connection's requests are handled one at a time, so a client waiting
+  for a move is not read from (TCP backpressure) and the queue holds at
+  most one move per connection.
+- ms / latency: from reading the request to the reply, queueing included.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+import itertools
+import json
+import math
+import multiprocessing
+import time
+
+from constants import BLACK, WHITE
+from game.gamestate import GameState, opponent
+from src.parallel.session_pool import PoolBusy, SessionPool
+from src.settings import BOARD_LENGTH, TIME_LIMIT
+
+_COLORS = {"black": BLACK, "white": WHITE}
+_WINNERS = {BLACK: "black", WHITE: "white"}
+LATENCY_WINDOW = 10_000  # latest move latencies kept for the percentiles
+
+
+class RequestError(Exception):
+    pass
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank q-th percentile (0 <= q <= 100), None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil
+    return ordered[int(rank) - 1]
+
+
+class LatencyStats:
+    __slots__ = ("moves", "busy", "start", "_latencies")
+
+    def __init__(self):
+        self.moves = 0
+        self.busy = 0  # requests refused with "busy"
+        self.start = time.perf_counter()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def add(self, seconds: float) -> None:
+        self.moves += 1
+        self._latencies.append(seconds)
+
+    def report(self) -> dict:
+        latencies = list(self._latencies)
+        elapsed = time.perf_counter() - self.start
+        return {
+            "moves": self.moves,
+            "busy": self.busy,
+            "moves_per_s": round(self.moves / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": _ms(percentile(latencies, 50)),
+            "p99_ms": _ms(percentile(latencies, 99)),
+        }
+
+
+@dataclass
+class Session:
+    state: GameState
+    ai: int  # color the engine plays
+    time_limit: float
+    worker: int
+
+
+class MoveServer:
+    def __init__(self, pool: SessionPool, max_time: float):
+        self.pool = pool
+        self.max_time = max_time
+        self.stats = LatencyStats()
+        self.sessions: dict[str, Session] = {}
+        self._ids = itertools.count(1)
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        owned: set[str] = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                reply = await self.handle_line(line, owned)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self._close(session_id)
+            writer.close()
+
+    async def handle_line(self, line: bytes, owned: set[str]) -> dict:
+        start = time.perf_counter()
+        request: dict = {}
+        try:
+            parsed = json.loads(line)
+            if not isinstance(parsed, dict):
+                raise RequestError("request must be a JSON object")
+            request = parsed
+            reply = await self._dispatch(request, owned)
+        except PoolBusy:
+            self.stats.busy += 1
+            reply = {"ok": False, "error": "busy"}
+        except json.JSONDecodeError:
+            reply = {"ok": False, "error": "invalid JSON"}
+        except (RequestError, ValueError) as e:
+            reply = {"ok": False, "error": str(e)}
+        if reply.get("move") is not None:
+            self.stats.add(time.perf_counter() - start)
+            reply["ms"] = _ms(time.perf_counter() - start)
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def _dispatch(self, request: dict, owned: set[str]) -> dict:
+        op = request.get("op")
+        if op == "new":
+            return await self._new(request, owned)
+        if op == "play":
+            return await self._play(request, owned)
+        if op == "close":
+            session_id = self._owned_id(request, owned)
+            owned.discard(session_id)
+            self._close(session_id)
+            return {"ok": True}
+        if op == "stats":
+            return {
+                "ok": True,
+                **self.stats.report(),
+                "queue": self.pool.pending,
+                "sessions": len(self.sessions),
+                "workers": self.pool.n_workers,
+            }
+        raise RequestError(f"unknown op: {op!r}")
+
+    async def _new(self, request: dict, owned: set[str]) -> dict:
+        color = request.get("ai", "white")
+        if color not in ("black", "white"):
+            raise RequestError("ai must be 'black' or 'white'")
+        ai = _COLORS[color]
+        time_limit = request.get("time", TIME_LIMIT)
+        if (
+            isinstance(time_limit, bool)
+            or not isinstance(time_limit, (int, float))
+            or not math.isfinite(time_limit)
+            or time_limit <= 0
+        ):
+            raise RequestError("time must be a positive number of seconds")
+        time_limit = min(float(time_limit), self.max_time)
+        if ai == BLACK and self.pool.full:
+            raise PoolBusy
+        session_id = f"s{next(self._ids)}"
+        session = Session(
+            GameState(current_player=BLACK), ai, time_limit, self.pool.open()
+        )
+        self.sessions[session_id] = session
+        owned.add(session_id)
+        reply = {"ok": True, "session": session_id, "move": None, "winner": None}
+        if ai == BLACK:
+            reply.update(await self._engine_move(session_id, session))
+        return reply
+
+    async def _play(self, request: dict, owned: set[str]) -> dict:
+        session_id = self._owned_id(request, owned)
+        session = self.sessions[session_id]
+        state = session.state
+        if state.is_terminal:
+            raise RequestError("game is over")
+        move = request.get("move")
+        if not (
+            isinstance(move, list)
+            and len(move) == 2
+            and all(isinstance(v, int) and 0 <= v < BOARD_LENGTH for v in move)
+        ):
+            raise RequestError("move must be [x, y] on the board")
+        if self.pool.full:
+            raise PoolBusy  # before the move is played, so a retry is safe
+        _play(state, (move[0], move[1]))  # ValueError: occupied
+        if state.is_terminal:
+            return {"ok": True, "move": None, "winner": _winner(state)}
+        return {"ok": True, **await self._engine_move(session_id, session)}
+
+    async def _engine_move(self, session_id: str, session: Session) -> dict:
+        move, info = await self.pool.select_move(
+            session.worker, session_id, session.ai, session.time_limit, session.state
+        )
+        _play(session.state, move)
+        return {"move": list(move), "winner": _winner(session.state), **info}
+
+    def _owned_id(self, request: dict, owned: set[str]) -> str:
+        session_id = request.get("session")
+        if not isinstance(session_id, str) or session_id not in owned:
+            raise RequestError(f"unknown session: {session_id!r}")
+        return session_id
+
+    def _close(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.pool.close_session(session.worker, session_id)
+
+
+async def serve(
+    host: str, port: int, n_workers: int, max_queue: int, max_time: float
+) -> None:
+    pool = SessionPool(n_workers, max_queue)
+    server = MoveServer(pool, max_time)
+    tcp = await asyncio.start_server(server.handle_client, host, port)
+    print(f"serving on {host}:{port} ({n_workers} engine processes)", flush=True)
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        pool.close()
+
+
+# ------------------------------------------------------------------ #
+#                             helpers
+# ------------------------------------------------------------------ #
+
+
+def _play(state: GameState, move: tuple[int, int]) -> None:
+    state.apply_move(move)
+    state.current_player = opponent(state.current_player)
+
+
+def _winner(state: GameState) -> str | None:
+    if not state.is_terminal:
+        return None
+    return _WINNERS.get(state.winner, "draw")
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def add_server_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="engine processes (default: cpu count)",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="moves waiting or running before requests are refused as busy",
+    )
+    parser.add_argument(
+        "--max-time",
+        type=float,
+        default=TIME_LIMIT,
+        help="cap on a session's seconds per move",
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Line-JSON move server")
+    add_server_args(parser)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        asyncio.run(
+            serve(args.host, args.port, args.workers, args.max_queue, args.max_time)
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,20 @@ TIME_LIMIT = 1
 N_ROLLOUT = 5  # Number of rollouts (playouts) to average in a single simulation
 MAX_DEPTH = 20  # Maximum number of moves per rollout (rollout depth limit)
 ROLLOUT_SAMPLE_SIZE = 5  # Number of candidate moves evaluated per rollout step
+# "batch" (NumPy lockstep), "pattern" (local windows) or "heuristic"
+ROLLOUT_POLICY = "batch"
+ROLLOUT_BATCH_LEAVES = 8  # "batch": leaves selected and evaluated together
+TREE_STORAGE = "node"  # single thread tree: "node" (Node objects) or "array" (ArrayMCTree)
+TT_CAPACITY = 200_000  # Max positions in the transposition table (0: disabled)
+EVAL_CACHE_CAPACITY = 50_000  # heuristic_evaluate memo entries per process (0: off)
+PONDERING = True  # human vs AI: the AI keeps searching while the human thinks
+PONDER_MAX_ITERATION = 20_000  # cap on background iterations per opponent turn
+OPENING_BOOK_PATH = "./data/opening_book.bin"  # built by build_book.py; unused if missing
+SYMMETRY_PRUNING = True  # expand one move per symmetry class at symmetric positions
+THREAT_NODE_BUDGET = 1000  # threat-space search nodes before MCTS (0: disabled)
+TIME_BANK = None  # seconds per game for each AI, spread over its moves (None: TIME_LIMIT per move)
+EARLY_STOP = True  # stop once the runner-up cannot catch the most visited move
+TIME_EXTEND = 1.5  # up to this multiple of the budget when the top two are close
+CLOSE_VISIT_RATIO = 0.8  # runner-up / leader visits counted as close
+SEARCH_STATS = True  # collect SearchStats for every move (False: no timers at all)
 DEBUG_MODE = False
@@ -0,0 +1,296 @@
+"""
+Headless engine-vs-engine tournament.
+
+    PYTHONPATH=src python -m tournament --games 200 --jobs 4 \\
+        --a "iterations=400,time=0.5" --b "iterations=400,time=0.5,rollouts=3"
+
+- Games run in a process pool, one single-threaded game per worker
+  (a side in root / leaf mode needs processes itself: use --jobs 1).
+- Side spec: comma separated key=value, keys in SIDE_KEYS.
+- Games come in pairs on the same random opening with colors swapped.
+- Every game is one JSON line in the log as soon as it ends
+  (moves as "hhig..", column then row letters); totals, W/D/L and the
+  Elo difference of A over B with a 95% interval are printed as it goes.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+import datetime
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+import settings
+from constants import BLACK, WHITE
+from game.gamestate import GameState, opponent
+from src.game.agent import Agent
+from src.game.mctree import RolloutParams
+from src.game.opening_book import load_book
+from src.parallel.mode import ParallelMode
+
+_PROCESS_MODES = (ParallelMode.ROOT, ParallelMode.LEAF)
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+# spec key -> (Side field, type)
+SIDE_KEYS = {
+    "name": ("name", str),
+    "iterations": ("n_iteration", int),
+    "time": ("time_limit", float),
+    "mode": ("parallel_mode", ParallelMode),
+    "workers": ("n_workers", int),
+    "rollouts": ("n_rollout", int),
+    "depth": ("max_depth", int),
+    "sample": ("sample_size", int),
+    "blend": ("k_blend", float),
+    "policy": ("rollout_policy", str),
+    "book": ("book_path", str),
+    "bank": ("time_bank", float),
+}
+
+
+@dataclass
+class Side:
+    name: str
+    n_iteration: int = settings.N_ITERATION
+    time_limit: float = settings.TIME_LIMIT
+    parallel_mode: ParallelMode = ParallelMode.NONE
+    n_workers: int = 1
+    n_rollout: int = settings.N_ROLLOUT
+    max_depth: int = settings.MAX_DEPTH
+    sample_size: int = settings.ROLLOUT_SAMPLE_SIZE
+    k_blend: float = RolloutParams().k_blend
+    rollout_policy: str = settings.ROLLOUT_POLICY
+    book_path: str | None = None
+    time_bank: float | None = settings.TIME_BANK
+
+    @classmethod
+    def parse(cls, spec: str, default_name: str) -> Side:
+        side = cls(default_name)
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            key, _, value = item.partition("=")
+            if key not in SIDE_KEYS:
+                raise ValueError(f"unknown side key: {key!r}")
+            attr, cast = SIDE_KEYS[key]
+            setattr(side, attr, cast(value))
+        return side
+
+    def make_agent(self, player_id: int) -> Agent:
+        return Agent(
+            player_id,
+            self.time_limit,
+            self.n_iteration,
+            self.parallel_mode,
+            self.n_workers,
+            rollout_params=RolloutParams(
+                self.n_rollout,
+                self.max_depth,
+                self.sample_size,
+                self.k_blend,
+                self.rollout_policy,
+            ),
+            book=load_book(self.book_path) if self.book_path else None,
+            time_bank=self.time_bank,
+        )
+
+
+@dataclass
+class Totals:
+    wins: int = 0  # of side A
+    draws: int = 0
+    losses: int = 0
+    by_color: dict[str, int] = field(default_factory=lambda: {"black": 0, "white": 0})
+
+    @property
+    def n_games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, record: dict) -> None:
+        if record["winner"] is None:
+            self.draws += 1
+            return
+        if record["winner"] == "A":
+            self.wins += 1
+        else:
+            self.losses += 1
+        won_black = record["winner"] == record["black"]
+        self.by_color["black" if won_black else "white"] += 1
+
+    def elo(self, z: float = 1.96) -> tuple[float, float, float]:
+        """Elo of A over B and the bounds of its ~95% interval"""
+        n = self.n_games
+        if n == 0:
+            return 0.0, -math.inf, math.inf
+        score = (self.wins + 0.5 * self.draws) / n
+        var = (
+            self.wins * (1 - score) ** 2
+            + self.draws * (0.5 - score) ** 2
+            + self.losses * score**2
+        ) / n
+        margin = z * math.sqrt(var / n)
+        return _elo(score), _elo(score - margin), _elo(score + margin)
+
+    def summary(self) -> str:
+        elo, low, high = self.elo()
+        return (
+            f"{self.n_games} games  A +{self.wins} ={self.draws} -{self.losses}  "
+            f"Elo(A-B) {elo:+.0f} [{low:+.0f}, {high:+.0f}]  "
+            f"decisive by black/white {self.by_color['black']}/{self.by_color['white']}"
+        )
+
+
+def random_opening(rng: random.Random, n_moves: int) -> list[tuple[int, int]]:
+    """n_moves distinct stones within 2 cells of the center"""
+    center = settings.BOARD_LENGTH // 2
+    cells = [
+        (center + dx, center + dy) for dx in range(-2, 3) for dy in range(-2, 3)
+    ]
+    return rng.sample(cells, n_moves)
+
+
+def play_one(job: tuple[int, Side, Side, int, int]) -> dict:
+    """One game; side A plays black in even games (pairs share the opening)"""
+    game_id, side_a, side_b, seed, opening_moves = job
+    rng = random.Random(seed + game_id // 2)
+    opening = random_opening(rng, opening_moves)
+    random.seed(seed + game_id)
+    np.random.seed((seed + game_id) % 2**32)
+
+    a_is_black = game_id % 2 == 0
+    black, white = (side_a, side_b) if a_is_black else (side_b, side_a)
+    agents = {BLACK: black.make_agent(BLACK), WHITE: white.make_agent(WHITE)}
+
+    state = GameState(current_player=BLACK)
+    moves = []
+    start = time.perf_counter()
+    try:
+        for move in opening:
+            _play(state, move)
+            moves.append(move)
+        while not state.is_terminal:
+            move = agents[state.current_player].select_move(state)
+            _play(state, move)
+            moves.append(move)
+    finally:
+        for agent in agents.values():
+            agent.close()
+
+    winner = None
+    if state.winner == BLACK:
+        winner = "A" if a_is_black else "B"
+    elif state.winner == WHITE:
+        winner = "B" if a_is_black else "A"
+    return {
+        "game": game_id,
+        "black": "A" if a_is_black else "B",
+        "winner": winner,
+        "n_moves": len(moves),
+        "seconds": round(time.perf_counter() - start, 2),
+        "moves": "".join(_LETTERS[x] + _LETTERS[y] for x, y in moves),
+    }
+
+
+def run(args: argparse.Namespace, side_a: Side, side_b: Side) -> Totals:
+    jobs = [
+        (i, side_a, side_b, args.seed, args.opening_moves) for i in range(args.games)
+    ]
+    totals = Totals()
+    os.makedirs(os.path.dirname(args.log) or ".", exist_ok=True)
+    with open(args.log, "w") as log:
+        header = {
+            "A": side_a.__dict__,
+            "B": side_b.__dict__,
+            "seed": args.seed,
+            "opening_moves": args.opening_moves,
+        }
+        log.write(json.dumps(header, default=str) + "\n")
+
+        if args.jobs == 1:
+            results = map(play_one, jobs)
+            pool = None
+        else:
+            pool = mp.Pool(args.jobs)
+            results = pool.imap_unordered(play_one, jobs)
+        try:
+            for record in results:
+                log.write(json.dumps(record) + "\n")
+                log.flush()
+                totals.add(record)
+                if totals.n_games % args.report_every == 0:
+                    print(totals.summary(), flush=True)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+    return totals
+
+
+# ------------------------------------------------------------------ #
+#                             helpers
+# ------------------------------------------------------------------ #
+
+
+def _play(state: GameState, move: tuple[int, int]) -> None:
+    state.apply_move(move)
+    state.current_player = opponent(state.current_player)
+
+
+def _elo(score: float) -> float:
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Engine-vs-engine tournament")
+    parser.add_argument("--a", type=str, default="", help="side A spec (key=value,...)")
+    parser.add_argument("--b", type=str, default="", help="side B spec (key=value,...)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=mp.cpu_count(),
+        help="games played at once (default: cpu count)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--opening-moves",
+        type=int,
+        default=2,
+        help="random stones near the center before the engines play",
+    )
+    parser.add_argument("--report-every", type=int, default=10, metavar="N")
+    parser.add_argument("--log", type=str, default=None, help="game log (JSON lines)")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        side_a = Side.parse(args.a, "A")
+        side_b = Side.parse(args.b, "B")
+    except ValueError as e:
+        sys.exit(f"tournament: {e}")
+    uses_processes = {side_a.parallel_mode, side_b.parallel_mode} & set(_PROCESS_MODES)
+    if uses_processes and args.jobs != 1:
+        sys.exit("tournament: root / leaf sides start processes, use --jobs 1")
+    if args.log is None:
+        now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        args.log = f"./data/tournament_{now}.jsonl"
+
+    totals = run(args, side_a, side_b)
+    print(totals.summary())
+    print(f"log: {args.log}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Incremental GameState features against their from-scratch references.
+
+    PYTHONPATH=src python -m pytest -q tests
+
+Random games with moves near the stones already played, so that runs,
+open ends and fives are common. Every position is checked.
+"""
+
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from constants import BLACK, DIRS, WHITE, WIN_STONE_CNT
+from game.bitboard import STRIDE, has_five, has_five_through
+from game.gamestate import BOARD_N_BITS, GameState, opponent
+from game.heuristic import full_scan_evaluate, heuristic_evaluate
+from settings import BOARD_LENGTH
+
+N_GAMES = 40
+
+
+def random_games(seed: int = 0, n_games: int = N_GAMES):
+    """Yield every position of n_games random games, in play order"""
+    rng = random.Random(seed)
+    for _ in range(n_games):
+        state = GameState(current_player=BLACK)
+        played: set[tuple[int, int]] = set()
+        while not state.is_terminal:
+            move = _near_move(rng, played)
+            played.add(move)
+            state.apply_move(move)
+            yield state
+            state.current_player = opponent(state.current_player)
+
+
+def test_incremental_counts_match_rebuild():
+    for state in random_games():
+        rebuilt = GameState(
+            current_player=state.current_player,
+            color_bitset=state.color_bitset,
+            occupy_bitset=state.occupy_bitset,
+        )
+        assert state.pattern_counts == rebuilt.pattern_counts
+        assert state.center_sum == rebuilt.center_sum
+        assert state.stones == rebuilt.stones
+        assert state.zobrist == rebuilt.zobrist
+
+
+def test_heuristic_matches_full_scan():
+    for state in random_games(seed=1):
+        for player in (BLACK, WHITE):
+            assert heuristic_evaluate(state, player) == pytest.approx(
+                full_scan_evaluate(state, player)
+            )
+
+
+def test_fives_match_naive_scan():
+    for state in random_games(seed=2):
+        x, y = state.last_move
+        for color in (BLACK, WHITE):
+            expected = _naive_five(state, color)
+            assert has_five(state.stones[color]) == expected
+        mover = state.current_player
+        assert has_five_through(state.stones[mover], y * STRIDE + x) == (
+            _naive_five(state, mover)
+        )
+        full = state.occupy_bitset.bit_count() == BOARD_N_BITS
+        assert state.is_terminal == (_naive_five(state, mover) or full)
+        if state.is_terminal and not full:
+            assert state.winner == mover
+
+
+def test_undo_restores_every_field():
+    rng = random.Random(3)
+    for _ in range(N_GAMES):
+        state = GameState(current_player=BLACK)
+        played: set[tuple[int, int]] = set()
+        history = []
+        while not state.is_terminal:
+            history.append(state.clone())
+            move = _near_move(rng, played)
+            played.add(move)
+            state.apply_move(move)
+            state.current_player = opponent(state.current_player)
+        for before in reversed(history):
+            state.undo_move()
+            for name in (
+                "current_player",
+                "color_bitset",
+                "occupy_bitset",
+                "last_move",
+                "is_terminal",
+                "winner",
+                "pattern_counts",
+                "center_sum",
+                "zobrist",
+                "stones",
+            ):
+                assert getattr(state, name) == getattr(before, name), name
+
+
+# ------------------------------------------------------------------ #
+#                             helpers
+# ------------------------------------------------------------------ #
+
+
+def _near_move(rng: random.Random, played: set[tuple[int, int]]) -> tuple[int, int]:
+    if not played:
+        return BOARD_LENGTH // 2, BOARD_LENGTH // 2
+    near = {
+        (x + dx, y + dy)
+        for x, y in played
+        for dx in range(-2, 3)
+        for dy in range(-2, 3)
+        if 0 <= x + dx < BOARD_LENGTH and 0 <= y + dy < BOARD_LENGTH
+    }
+    return rng.choice(sorted(near - played))
+
+
+def _naive_five(state: GameState, color: int) -> bool:
+    """Walk WIN_STONE_CNT cells from every cell in every direction"""
+
+    def stone(x: int, y: int) -> int | None:
+        if not (0 <= x < BOARD_LENGTH and 0 <= y < BOARD_LENGTH):
+            return None
+        i = y * BOARD_LENGTH + x
+        if not (state.occupy_bitset >> i) & 1:
+            return None
+        return (state.color_bitset >> i) & 1
+
+    return any(
+        all(stone(x + k * dx, y + k * dy) == color for k in range(WIN_STONE_CNT))
+        for y in range(BOARD_LENGTH)
+        for x in range(BOARD_LENGTH)
+        for dx, dy in DIRS
+    )